@@ -1,133 +1,98 @@
+import time
+
+# Taken before the other imports, for the STARTUP_PROFILE report
+RUN_STARTED = time.perf_counter()
+
 import streamlit as st
-import json
 import os
+import functools
 import hashlib
-from openai import OpenAI
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Dict, List
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Load your product data
-PRODUCT_DATA = {
-    "products": [
-        {
-            "name": "OptimAIze Buddy",
-            "description": "A multilingual, AI-powered assistant for navigating complex services using verified data sources.",
-            "business_context": {
-                "target_market": "Enterprise customer service, Government services, Healthcare portals",
-                "revenue_model": "SaaS subscription, Pay-per-query, Enterprise licensing",
-                "kpis": ["User satisfaction score", "Support ticket reduction", "Multilingual adoption rate", "Average resolution time"],
-                "competitive_advantage": "24/7 multilingual support, Verified data sources, Form automation",
-                "growth_metrics": "Monthly active users, Query success rate, Cost per resolution",
-                "business_impact": "Reduces support costs by 40-60%, Improves customer satisfaction by 30%",
-                "challenges": "Integration complexity, Data verification overhead, Language model accuracy"
-            },
-            "features": [
-                "Answers queries across multiple domains",
-                "24/7 multilingual access",
-                "Form filling & booking inside chat",
-                "Reduces support burden"
-            ]
-        },
-        {
-            "name": "OptimAIze Automation",
-            "description": "AI-based document screening solution for automating application and compliance workflows.",
-            "business_context": {
-                "target_market": "Banking, Insurance, Legal, Government compliance",
-                "revenue_model": "Transaction-based pricing, Enterprise contracts, API calls",
-                "kpis": ["Processing time reduction", "Error rate reduction", "Compliance accuracy", "Manual review reduction"],
-                "competitive_advantage": "Real-time error detection, Content quality analysis, Multi-format support",
-                "growth_metrics": "Documents processed per month, Accuracy improvement, Customer retention rate",
-                "business_impact": "Increases processing speed by 70%, Reduces compliance errors by 85%",
-                "challenges": "Document variability, Regulatory changes, Integration with legacy systems"
-            },
-            "features": [
-                "Validates file types & completeness",
-                "Content quality analysis",
-                "Flags errors in real-time"
-            ]
-        },
-        {
-            "name": "OptimAIze Assist",
-            "description": "GenAI-powered tool trained on manuals and SOPs to assist field operators & engineers in real-time.",
-            "business_context": {
-                "target_market": "Manufacturing, Utilities, Oil & Gas, Telecommunications",
-                "revenue_model": "Per-user subscription, Equipment-based licensing, Service contracts",
-                "kpis": ["First-time fix rate", "Mean time to repair", "Knowledge utilization", "Escalation rate reduction"],
-                "competitive_advantage": "Trained on proprietary manuals, Real-time troubleshooting, Escalation automation",
-                "growth_metrics": "Active technicians, Solved incidents per day, Manual usage reduction",
-                "business_impact": "Reduces equipment downtime by 35%, Improves first-time fix rate by 50%",
-                "challenges": "Knowledge base maintenance, Field connectivity, Technician adoption"
-            },
-            "features": [
-                "Answers from manuals & logs",
-                "Summarizes troubleshooting",
-                "Escalation automation"
-            ]
-        },
-        {
-            "name": "OptimAIze Grader",
-            "description": "An academic assistant that learns from human feedback and automates rubric-based grading.",
-            "business_context": {
-                "target_market": "Educational institutions, Online learning platforms, Corporate training",
-                "revenue_model": "Per-student pricing, Institutional licensing, Pay-per-assessment",
-                "kpis": ["Grading time reduction", "Grading consistency", "Feedback quality", "Instructor satisfaction"],
-                "competitive_advantage": "Learning from feedback, Rubric-based scoring, Standardization",
-                "growth_metrics": "Number of assessments, Institutions using, Student satisfaction",
-                "business_impact": "Reduces grading time by 80%, Improves grading consistency by 95%",
-                "challenges": "Rubric complexity, Subjectivity handling, Institutional adoption"
-            },
-            "features": [
-                "Rubric-based scoring",
-                "Learns over time",
-                "Standardizes evaluation"
-            ]
-        },
-        {
-            "name": "OptimAIze PID Reader",
-            "description": "Engineering drawing intelligence system that analyzes P&ID drawings to detect, track, and map pipeline paths, instruments, and equipment.",
-            "business_context": {
-                "target_market": "Engineering firms, Construction companies, Oil & Gas, Chemical plants",
-                "revenue_model": "Per-drawing analysis, Project-based pricing, Enterprise licensing",
-                "kpis": ["Drawing analysis time", "Error detection rate", "Compliance accuracy", "Project risk reduction"],
-                "competitive_advantage": "AutoCAD DXF/CAD support, Instrument identification, Pipeline mapping",
-                "growth_metrics": "Drawings processed, Error prevention rate, Project acceleration",
-                "business_impact": "Reduces design review time by 65%, Prevents construction errors by 90%",
-                "challenges": "Drawing format variations, Legacy drawing quality, Industry standards compliance"
-            },
-            "features": [
-                "Identifies pipeline start/end points",
-                "Recognizes instruments and equipment",
-                "Maps pipeline connections",
-                "Detects design errors",
-                "Classifies components by type"
-            ]
-        },
-        {
-            "name": "OptimAIze Price Predictor",
-            "description": "Market intelligence system that predicts vehicle/product prices using statistical and LLM approaches based on comprehensive datasets.",
-            "business_context": {
-                "target_market": "Automotive dealers, E-commerce platforms, Insurance companies, Financial institutions",
-                "revenue_model": "Per-prediction API, Subscription plans, Enterprise analytics",
-                "kpis": ["Prediction accuracy", "Market coverage", "Response time", "Customer adoption"],
-                "competitive_advantage": "Multi-feature analysis, Real-time market data, Statistical + LLM hybrid",
-                "growth_metrics": "Predictions per month, Market segments covered, Accuracy improvement",
-                "business_impact": "Improves pricing accuracy by 25%, Reduces market research time by 75%",
-                "challenges": "Data quality variability, Market volatility, Feature importance weighting"
-            },
-            "features": [
-                "Uses features: price, brand, model, mileage, transmission, CO2 emissions, emission class, fuel type, warranty",
-                "Statistical and LLM-based predictions",
-                "Market trend analysis",
-                "Competitive pricing insights",
-                "Real-time market data integration"
-            ],
-            "prediction_approach": "Combines statistical regression models with LLM-based market intelligence for hybrid predictions"
-        }
-    ]
-}
+from products import CatalogError, get_catalog, get_catalog_loader
+from prompts import PROMPT_ENCODINGS, get_cached_system_prompt
+from response_cache import ResponseCache, conversation_hash
+from chat_history import HistoryWindow
+from session_store import SessionStore, create_backend
+from retrieval import get_catalog_index, is_catalog_wide, is_follow_up
+from fanout import run_fanout_analysis
+from routing import get_router
+from scheduler import INTERACTIVE, get_scheduler
+from structured import MAX_SCORE, STRUCTURED_INSTRUCTIONS, StructuredAnalysis, build_response_format, parse_analysis
+from telemetry import CallRecord, get_telemetry, request_size
+from product_index import COUNT_SORT_KEYS, IMPACT_CATEGORIES, get_product_table
+
+IMPORTS_MS = (time.perf_counter() - RUN_STARTED) * 1000
+
+@st.cache_resource(show_spinner=False)
+def load_environment():
+    """Load environment variables from the .env file, once per process rather than every rerun"""
+    from dotenv import load_dotenv
+    return load_dotenv()
+
+# Loaded at import, not in main(): the settings below and headless.py read .env values,
+# so `import app` does import python-dotenv
+load_environment()
+ENV_MS = (time.perf_counter() - RUN_STARTED) * 1000 - IMPORTS_MS
+
+# Report per-phase timings of every full run in the sidebar and the "startup" log
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "0") == "1"
+
+# Level of the "routing" log, which has one INFO line per question (tier, model, latency)
+ROUTING_LOG_LEVEL = os.getenv("ROUTING_LOG_LEVEL", "INFO").upper()
+
+# Seconds before the connection probe is repeated for the same key (0 = once per key)
+PROBE_TTL_SECONDS = float(os.getenv("OPENAI_PROBE_TTL", "0"))
+
+# You can change to "gpt-3.5-turbo" if needed
+ANALYSIS_MODEL = os.getenv("OPENAI_ANALYSIS_MODEL", "gpt-4o")
+ANALYSIS_TEMPERATURE = 0.7
+
+# Products included in full for product-specific questions (0 = always send the whole catalog)
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+
+# Parallel per-product calls in map-reduce mode
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "4"))
+
+# Prompt tokens allowed for past chat turns, and for the summary of turns older than that
+HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2000"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKEN_BUDGET", "300"))
+
+# SQLite file for cached answers; set to an empty string to disable the cache
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(".cache", "responses.sqlite3"))
+
+# Where chat sessions are kept: a SQLite file, memory:// or redis://...
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", os.path.join(".cache", "sessions.sqlite3"))
+# Messages rendered per page of chat history
+CHAT_PAGE_SIZE = int(os.getenv("CHAT_PAGE_SIZE", "20"))
+
+# Run the chat pane and the dashboards as separate st.fragment regions, so a new
+# chat message does not re-render the dashboards (0 = one full-page rerun)
+INCREMENTAL_RENDERING = os.getenv("INCREMENTAL_RENDERING", "1") != "0"
+
+GREETING = "Hello! I'm your Business Analysis Assistant. I can help you analyze OptimAIze products from a business perspective. Ask me about product comparisons, revenue models, target markets, or business impact!"
+
+# Completion budget for structured (JSON) answers, which score every product
+STRUCTURED_MAX_TOKENS = int(os.getenv("STRUCTURED_MAX_TOKENS", "1500"))
+
+# How the catalog is written into the system prompt: indented, minified, markdown or table
+PROMPT_ENCODING = os.getenv("PROMPT_ENCODING", "indented")
+if PROMPT_ENCODING not in PROMPT_ENCODINGS:
+    raise ValueError(f"PROMPT_ENCODING must be one of {PROMPT_ENCODINGS}, got {PROMPT_ENCODING!r}")
+
+@st.cache_resource(show_spinner=False)
+def configure_logging():
+    """Send the "routing" and "startup" logs to stderr, once per process"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+    for name, level in (("routing", ROUTING_LOG_LEVEL), ("startup", logging.INFO)):
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+        logger.addHandler(handler)
+        logger.propagate = False
 
 def setup_openai():
     """Set up OpenAI API from environment variables using dotenv"""
@@ -179,175 +144,701 @@ def setup_openai():
     
     if api_key:
         try:
-            client = OpenAI(api_key=api_key)
-            
-            # Test the connection with a simple request
-            try:
-                test_response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": "test"}],
-                    max_tokens=5
-                )
-                st.sidebar.success("✅ OpenAI API connected successfully")
-                return client
-            except Exception as test_error:
-                st.sidebar.warning("⚠️ API key loaded but connection test failed")
-                # Still return client, might work with actual requests
-                return client
-                
+            return get_openai_client(api_key)
         except Exception as e:
             st.sidebar.error(f"❌ API Connection Failed: {str(e)}")
             return None
     return None
 
-def get_system_prompt():
+class LazyOpenAIClient:
+    """OpenAI client that is built, and the openai package imported, on first use"""
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    self._client = OpenAI(api_key=self.api_key)
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+@st.cache_resource(show_spinner=False)
+def get_openai_client(api_key):
+    """Create one OpenAI client, and so one HTTP connection pool, per API key"""
+    return LazyOpenAIClient(api_key)
+
+class ConnectionProbe:
+    """Background connection test for one API key, shared across sessions and reruns"""
+
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+        self._future = None
+        self._started_at = 0.0
+        self.ok = None
+        self.latency_ms = None
+        self.error = None
+
+    def ensure_started(self, ttl=0):
+        """Start the probe unless it already ran (and, with a ttl, is still fresh)"""
+        with self._lock:
+            expired = ttl > 0 and time.monotonic() - self._started_at > ttl
+            if self._future is None or (expired and self._future.done()):
+                self._started_at = time.monotonic()
+                self._future = get_probe_executor().submit(self._run)
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            # Listing models checks the key and the network without spending tokens
+            with get_telemetry().track("probe", "models.list"):
+                self._client.models.list()
+            self.ok, self.error = True, None
+        except Exception as e:
+            self.ok, self.error = False, str(e)
+        finally:
+            self.latency_ms = (time.perf_counter() - start) * 1000
+
+@st.cache_resource(show_spinner=False)
+def get_probe_executor():
+    """Small thread pool that runs connection probes off the render path"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="openai-probe")
+
+@st.cache_resource(show_spinner=False)
+def get_connection_probe(api_key):
+    """Get the shared connection probe for an API key"""
+    return ConnectionProbe(get_openai_client(api_key))
+
+def display_connection_status(placeholder, client):
+    """Show the latest probe result without waiting for a pending probe"""
+    probe = get_connection_probe(client.api_key)
+    # Health check runs in the background, once per key (or per OPENAI_PROBE_TTL); started
+    # only after the page is rendered, it also imports openai off the first render
+    probe.ensure_started(PROBE_TTL_SECONDS)
+    with placeholder.container():
+        if probe.ok is None:
+            st.info("⏳ Checking OpenAI API connection...")
+        elif probe.ok:
+            st.success("✅ OpenAI API connected successfully")
+        else:
+            # Still keep the client, it might work with actual requests
+            st.warning("⚠️ API key loaded but connection test failed")
+        if probe.latency_ms is not None:
+            st.metric("⏱️ API Probe Latency", f"{probe.latency_ms:.0f} ms")
+
+def load_system_prompt(encoding=None, query=None):
+    """Get the precomputed system prompt for the current catalog
+    
+    With a query and RETRIEVAL_TOP_K set, only the products relevant to it are
+    included in full, next to a one-line summary of the rest of the catalog.
+    """
+    catalog = get_catalog()
+    product_names = ()
+    if query and RETRIEVAL_TOP_K > 0:
+        selected = get_catalog_index(catalog.data, catalog.version).select_products(query, RETRIEVAL_TOP_K)
+        if selected:
+            product_names = tuple(product["name"] for product in selected)
+    return get_cached_system_prompt(catalog.data, catalog.version, encoding or PROMPT_ENCODING, product_names)
+
+def get_system_prompt(query=None):
     """Create system prompt for business-focused chatbot"""
-    return """You are a Business Analysis Assistant for OptimAIze products. Your role is to provide:
-1. Non-technical business insights about our products
-2. Comparative analysis between products
-3. Target market recommendations
-4. Revenue model explanations
-5. Business impact analysis
-6. KPI explanations and tracking suggestions
-7. Competitive advantage positioning
-8. Growth strategy recommendations
-
-Rules:
-- ALWAYS provide non-technical, business-focused explanations
-- Use simple, clear language understandable by business executives
-- Focus on ROI, business value, and strategic positioning
-- When comparing products, highlight which is best for specific business needs
-- Provide actionable business recommendations
-- Never use technical jargon without business context
-- If asked about technical details, redirect to business implications
-
-Available Products Data:
-{products_data}
-
-Example Questions You Can Answer:
-1. "Which product is best for reducing operational costs?"
-2. "Compare all revenue models"
-3. "Which product is best for healthcare industry?"
-4. "What are the main business challenges?"
-5. "How do KPIs differ across products?"
-6. "Which product reduces costs the most?"
-7. "Compare target markets for all products"
-8. "What's the growth potential for each product?"
-
-Remember: You are talking to business professionals, not engineers. Focus on business outcomes, financial impact, and strategic value.""".format(products_data=json.dumps(PRODUCT_DATA, indent=2))
-
-def get_business_analysis(client, user_message, chat_history):
-    """Get business analysis from OpenAI"""
+    return load_system_prompt(query=query).text
+
+def build_messages(user_message, chat_history, history_window=None, stats=None):
+    """Assemble the system prompt, bounded chat history and current message for a completion
+    
+    Fills ``stats`` (if given) with per-turn prompt-token counts.
+    """
+    system_prompt = load_system_prompt(query=user_message)
+    history_window = history_window or HistoryWindow(HISTORY_TOKEN_BUDGET, SUMMARY_TOKEN_BUDGET)
+    window, window_stats = history_window.build(chat_history, user_message)
+    if stats is not None:
+        stats.update(window_stats)
+        stats["system_tokens"] = system_prompt.token_count
+        stats["prompt_tokens"] = (system_prompt.token_count + window_stats["summary_tokens"]
+                                  + window_stats["history_tokens"] + window_stats["user_tokens"])
+        stats["unbounded_prompt_tokens"] = system_prompt.token_count + window_stats["unbounded_tokens"]
+    return [{"role": "system", "content": system_prompt.text}] + window
+
+def route_question(user_message):
+    """Pick the catalog, small-model or full-model tier for a question"""
+    return get_router(get_catalog(), ANALYSIS_MODEL).classify(user_message)
+
+def get_business_analysis(client, user_message, chat_history, history_window=None, stats=None, route=None,
+                          priority=INTERACTIVE):
+    """Get business analysis from OpenAI, or from the catalog for plain lookups"""
+    route = route or route_question(user_message)
+    with get_router(get_catalog(), ANALYSIS_MODEL).timed(user_message, route):
+        if route.tier == "catalog":
+            with get_telemetry().track("catalog", "catalog"):
+                return route.answer
+        try:
+            messages = build_messages(user_message, chat_history, history_window, stats)
+            request = dict(
+                model=route.model,
+                messages=messages,
+                temperature=ANALYSIS_TEMPERATURE,
+                max_tokens=route.max_tokens,
+                top_p=0.9
+            )
+            # Retries belong to the shared scheduler, which also queues and rate-limits the call
+            create = client.with_options(max_retries=0).chat.completions.with_raw_response.create
+            with get_telemetry().track(f"analysis:{route.tier}", route.model, messages) as call:
+                raw = get_scheduler().submit(lambda: create(**request), request, priority, call=call)
+                call.retries += getattr(raw, "retries_taken", 0)
+                response = raw.parse()
+                call.set_usage(response.usage)
+            
+            return response.choices[0].message.content
+        except Exception as e:
+            return f"Error in business analysis: {str(e)}"
+
+def get_fanout_analysis(client, user_message, chat_history, history_window=None, stats=None):
+    """Answer a portfolio-wide question with concurrent per-product analyses and a synthesis"""
     try:
-        messages = [
-            {"role": "system", "content": get_system_prompt()},
-        ]
-        
-        # Add chat history
-        for message in chat_history:
-            messages.append({"role": message["role"], "content": message["content"]})
-        
-        # Add current user message
-        messages.append({"role": "user", "content": user_message})
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",  # You can change to "gpt-3.5-turbo" if needed
-            messages=messages,
-            temperature=0.7,
-            max_tokens=1000,
-            top_p=0.9
+        history_window = history_window or HistoryWindow(HISTORY_TOKEN_BUDGET, SUMMARY_TOKEN_BUDGET)
+        window, _ = history_window.build(chat_history, user_message)
+        return run_fanout_analysis(
+            client.api_key,
+            user_message,
+            get_catalog().products,
+            base_url=str(client.base_url),
+            history=window[:-1],
+            model=ANALYSIS_MODEL,
+            concurrency=FANOUT_CONCURRENCY,
+            stats=stats,
         )
-        
-        return response.choices[0].message.content
     except Exception as e:
         return f"Error in business analysis: {str(e)}"
 
+def get_structured_analysis(client, user_message, chat_history, history_window=None, stats=None, route=None,
+                            priority=INTERACTIVE):
+    """Get per-product scores, rankings and citations as a validated StructuredAnalysis
+    
+    Returns ``(analysis, None)``, or ``(None, error_text)`` with the usual error message.
+    """
+    route = route or route_question(user_message)
+    catalog = get_catalog()
+    with get_router(catalog, ANALYSIS_MODEL).timed(user_message, route):
+        try:
+            messages = build_messages(user_message, chat_history, history_window, stats)
+            messages[0] = {"role": "system", "content": messages[0]["content"] + STRUCTURED_INSTRUCTIONS}
+            request = dict(
+                model=route.model,
+                messages=messages,
+                temperature=ANALYSIS_TEMPERATURE,
+                max_tokens=STRUCTURED_MAX_TOKENS,
+                response_format=build_response_format(catalog),
+            )
+            create = client.with_options(max_retries=0).chat.completions.with_raw_response.create
+            with get_telemetry().track(f"structured:{route.tier}", route.model, messages) as call:
+                raw = get_scheduler().submit(lambda: create(**request), request, priority, call=call)
+                call.retries += getattr(raw, "retries_taken", 0)
+                response = raw.parse()
+                call.set_usage(response.usage)
+            return parse_analysis(response.choices[0].message.content, catalog), None
+        except Exception as e:
+            return None, f"Error in business analysis: {str(e)}"
+
+def stream_business_analysis(client, user_message, chat_history, timings=None, history_window=None, route=None):
+    """Yield business analysis tokens from OpenAI as they arrive
+    
+    Fills ``timings`` (if given) with ``ttft_ms``, ``total_ms`` and the prompt-token
+    counts from build_messages(). Errors are
+    yielded as the same "Error in business analysis" text as the blocking call.
+    Catalog lookups are yielded in one piece.
+    """
+    timings = timings if timings is not None else {}
+    route = route or route_question(user_message)
+    start = time.perf_counter()
+    stream = None
+    with get_router(get_catalog(), ANALYSIS_MODEL).timed(user_message, route):
+        if route.tier == "catalog":
+            with get_telemetry().track("catalog", "catalog"):
+                timings["ttft_ms"] = timings["total_ms"] = (time.perf_counter() - start) * 1000
+            yield route.answer
+            return
+        with get_telemetry().track(f"stream:{route.tier}", route.model) as call:
+            try:
+                # Inside the try, so a failure here is yielded as an error reply like any other
+                messages = build_messages(user_message, chat_history, history_window, timings)
+                call.request_chars = request_size(messages)
+                request = dict(
+                    model=route.model,
+                    messages=messages,
+                    temperature=ANALYSIS_TEMPERATURE,
+                    max_tokens=route.max_tokens,
+                    top_p=0.9,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                create = client.with_options(max_retries=0).chat.completions.with_raw_response.create
+                # A stream cannot be shared, so identical requests are not collapsed
+                raw = get_scheduler().submit(lambda: create(**request), request, dedup=False, call=call)
+                call.mark_first_byte(start)
+                call.retries += getattr(raw, "retries_taken", 0)
+                stream = raw.parse()
+                for chunk in stream:
+                    # With include_usage the last chunk has no choices, only token counts
+                    call.set_usage(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    token = chunk.choices[0].delta.content
+                    if token:
+                        if "ttft_ms" not in timings:
+                            timings["ttft_ms"] = (time.perf_counter() - start) * 1000
+                        yield token
+            except GeneratorExit:
+                # The rerun that cancelled us will not read further output
+                timings["cancelled"] = True
+                call.error = "cancelled"
+                raise
+            except Exception as e:
+                timings["error"] = True
+                call.error = f"{type(e).__name__}: {e}"
+                prefix = "\n\n" if "ttft_ms" in timings else ""
+                yield f"{prefix}Error in business analysis: {str(e)}"
+            finally:
+                if stream is not None:
+                    stream.close()
+                timings["total_ms"] = (time.perf_counter() - start) * 1000
+
+def get_history_window():
+    """Get this session's token-budgeted chat history window"""
+    if "history_window" not in st.session_state:
+        st.session_state.history_window = HistoryWindow(HISTORY_TOKEN_BUDGET, SUMMARY_TOKEN_BUDGET)
+    return st.session_state.history_window
+
+@st.cache_resource(show_spinner=False)
+def get_session_store():
+    """Open the shared chat session store"""
+    return SessionStore(
+        create_backend(SESSION_STORE_URL),
+        page_size=CHAT_PAGE_SIZE,
+        idle_seconds=float(os.getenv("SESSION_IDLE_SECONDS", "1800")),
+        max_sessions=int(os.getenv("SESSION_MAX_RESIDENT", "1000")),
+    )
+
+def get_chat_session():
+    """Get this browser session's chat, keyed by the ?session= URL parameter"""
+    store = get_session_store()
+    session_id = st.query_params.get("session")
+    if not store.is_valid_id(session_id):
+        session_id = store.new_session_id()
+        st.query_params["session"] = session_id
+    session = store.get(session_id)
+    if not session.length:
+        session.append("assistant", GREETING)
+    return session
+
+def render_region(name):
+    """Time a page region into st.session_state.render_timings, as an st.fragment if enabled"""
+    def decorate(func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings = st.session_state.setdefault("render_timings", {})
+                timings[name] = (time.perf_counter() - start) * 1000
+        return st.fragment(timed) if INCREMENTAL_RENDERING else timed
+    return decorate
+
+@st.cache_data(max_entries=500, show_spinner=False)
+def render_structured_analysis(analysis_json):
+    """Render a structured answer as a chart and tables; reruns replay the cached elements"""
+    analysis = StructuredAnalysis.from_json(analysis_json)
+    st.markdown(analysis.summary)
+    st.caption(f"Score by {analysis.criterion} (0-{MAX_SCORE})")
+    st.bar_chart(analysis.chart_data(), horizontal=True)
+    st.dataframe(analysis.ranking_rows(), hide_index=True)
+    with st.expander("📎 Cited catalog fields"):
+        st.dataframe(analysis.citation_rows(), hide_index=True)
+    st.markdown(f"**Recommendation:** {analysis.recommendation}")
+
+@st.cache_data(max_entries=2000, show_spinner=False)
+def render_past_message(role, content, data=None):
+    """Render a finished chat message; reruns replay the cached elements"""
+    with st.chat_message(role):
+        if data:
+            render_structured_analysis(data)
+        else:
+            st.markdown(content)
+
+def show_older_messages():
+    st.session_state.chat_messages_shown = st.session_state.get("chat_messages_shown", CHAT_PAGE_SIZE) + CHAT_PAGE_SIZE
+
+def display_chat_history(session):
+    """Render the most recent page of messages, with a button to page in older ones"""
+    shown = st.session_state.get("chat_messages_shown", CHAT_PAGE_SIZE)
+    if session.length > shown:
+        st.button(f"⬆️ Load older messages ({session.length - shown} more)", key="load_older",
+                  on_click=show_older_messages)
+    for message in session.recent(shown):
+        render_past_message(message["role"], message["content"], message.get("data"))
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    """Open the shared on-disk answer cache"""
+    return ResponseCache(
+        RESPONSE_CACHE_PATH,
+        max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1000")),
+        ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600))),
+        similarity_threshold=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0")),
+    )
+
+def get_conversation_key(chat_history, user_message, history_window, route):
+    """Cache context for a turn: a hash of the earlier turns for follow-ups, "" for standalone questions"""
+    if not is_follow_up(user_message, bool(route.products)):
+        return ""
+    window, _ = history_window.build(chat_history, user_message)
+    return conversation_hash(window[:-1])
+
+def get_cached_answer(cache, prompt, user_message, cache_model, conversation=""):
+    """Look up a cached answer (None if there is none or the cache is off)"""
+    if cache is None:
+        return None
+    started_at, start = time.time(), time.perf_counter()
+    cached = cache.get(prompt, user_message, cache_model, ANALYSIS_TEMPERATURE, conversation)
+    # Only hits stand in for an LLM call; misses are followed by the real call's own record
+    if cached is not None:
+        get_telemetry().record(CallRecord(kind="cache", model=cache_model, started_at=started_at,
+                                          latency_ms=(time.perf_counter() - start) * 1000, cache_hit=True))
+    return cached
+
+def render_structured_answer(client, user_message, chat_history, spinner_text):
+    """Render scores, rankings and citations as charts and tables
+    
+    Returns ``(markdown, analysis_json)``; the JSON is None for errors and catalog lookups.
+    """
+    route = route_question(user_message)
+    if route.tier == "catalog":
+        return render_business_analysis(client, user_message, chat_history, spinner_text), None
+    
+    # Cached per (system prompt, question, conversation): the prompt hash covers the catalog version
+    cache_model = f"{route.model}/structured"
+    cache = get_response_cache() if RESPONSE_CACHE_PATH else None
+    prompt = load_system_prompt(query=user_message)
+    history_window = get_history_window()
+    conversation = get_conversation_key(chat_history, user_message, history_window, route)
+    cached = get_cached_answer(cache, prompt, user_message, cache_model, conversation)
+    if cached:
+        render_structured_analysis(cached.response)
+        st.caption(f"♻️ Cached analysis · saved ~{cached.latency_ms:.0f} ms")
+        return StructuredAnalysis.from_json(cached.response).to_markdown(), cached.response
+    
+    start = time.perf_counter()
+    with st.spinner(spinner_text):
+        analysis, error = get_structured_analysis(client, user_message, chat_history, history_window,
+                                                  route=route)
+    if error:
+        st.markdown(error)
+        return error, None
+    data = analysis.to_json()
+    render_structured_analysis(data)
+    unverified = sum(not citation.verified for item in analysis.products for citation in item.citations)
+    if unverified:
+        st.caption(f"⚠️ {unverified} cited quotes do not match the catalog text")
+    if cache is not None:
+        cache.put(prompt, user_message, cache_model, ANALYSIS_TEMPERATURE, data, (time.perf_counter() - start) * 1000,
+                  conversation)
+    return analysis.to_markdown(), data
+
+def render_business_analysis(client, user_message, chat_history, spinner_text):
+    """Render an analysis into the current chat message, from cache or streaming if enabled"""
+    route = route_question(user_message)
+    if route.tier == "catalog":
+        response = get_business_analysis(client, user_message, chat_history, route=route)
+        st.markdown(response)
+        st.caption(f"📇 Answered from the product catalog ({route.reason})")
+        return response
+    
+    fanout = (route.tier == "full" and st.session_state.get("fanout_analysis", False)
+              and is_catalog_wide(user_message))
+    cache_model = f"{route.model}/fanout" if fanout else route.model
+    cache = get_response_cache() if RESPONSE_CACHE_PATH else None
+    prompt = load_system_prompt(query=user_message)
+    # Follow-ups ("Why?") depend on the conversation, so it is part of their key
+    history_window = get_history_window()
+    conversation = get_conversation_key(chat_history, user_message, history_window, route)
+    cached = get_cached_answer(cache, prompt, user_message, cache_model, conversation)
+    if cached:
+        st.markdown(cached.response)
+        st.caption(f"♻️ Cached answer · saved ~{cached.latency_ms:.0f} ms")
+        return cached.response
+    
+    start = time.perf_counter()
+    stats = {}
+    if fanout:
+        with st.spinner(f"Analyzing {len(get_catalog().products)} products in parallel..."):
+            response = get_fanout_analysis(client, user_message, chat_history, history_window, stats)
+            st.markdown(response)
+        failed = response.startswith("Error in business analysis")
+        if not failed:
+            st.caption(f"🧩 {len(stats['product_ms'])} product analyses in {stats['map_ms'] / 1000:.1f} s "
+                       f"(slowest {max(stats['product_ms'].values()) / 1000:.1f} s) · "
+                       f"synthesis {stats['synthesis_ms'] / 1000:.1f} s")
+    elif not st.session_state.get("stream_responses", True):
+        with st.spinner(spinner_text):
+            response = get_business_analysis(client, user_message, chat_history, history_window, stats, route)
+            st.markdown(response)
+        failed = response.startswith("Error in business analysis")
+    else:
+        response = st.write_stream(
+            stream_business_analysis(client, user_message, chat_history, stats, history_window, route)
+        )
+        if "ttft_ms" in stats:
+            st.caption(f"⚡ First token in {stats['ttft_ms']:.0f} ms · complete in {stats['total_ms']:.0f} ms")
+        failed = stats.get("error", False)
+    if route.tier == "small":
+        st.caption(f"🧭 Routed to {route.model} ({route.reason})")
+    if "prompt_tokens" in stats:
+        st.caption(f"🧮 Prompt: {stats['prompt_tokens']:,} tokens "
+                   f"({stats['unbounded_prompt_tokens']:,} with the full history)")
+    
+    if cache is not None and not failed:
+        cache.put(prompt, user_message, cache_model, ANALYSIS_TEMPERATURE, response,
+                  (time.perf_counter() - start) * 1000, conversation)
+    return response
+
+def display_cache_stats():
+    """Show response cache hit/miss counts and saved latency in the sidebar"""
+    if not RESPONSE_CACHE_PATH:
+        return
+    stats = get_response_cache().stats()
+    st.sidebar.subheader("🗄️ Response Cache")
+    col1, col2, col3 = st.sidebar.columns(3)
+    col1.metric("Hits", stats["hits"])
+    col2.metric("Misses", stats["misses"])
+    col3.metric("Saved", f"{stats['saved_ms'] / 1000:.1f} s")
+    st.sidebar.caption(f"{stats['entries']} cached answers · {stats['semantic_hits']} near-duplicate hits")
+
+def display_scheduler_status():
+    """Show the shared OpenAI request queue in the sidebar"""
+    stats = get_scheduler().stats()
+    status = f"🚦 Request queue: {stats['queued']} waiting · {stats['running']} running"
+    if stats["retries"] or stats["deduplicated"]:
+        status += f" · {stats['retries']} retries · {stats['deduplicated']} shared"
+    if stats["paused_s"]:
+        status += f" · rate limited for {stats['paused_s']:.0f} s"
+    st.sidebar.caption(status)
+
+def display_routing_status():
+    """Show how many questions each routing tier answered, and how fast, in the sidebar"""
+    stats = get_router(get_catalog(), ANALYSIS_MODEL).stats()
+    if not any(row["questions"] for row in stats):
+        return
+    st.sidebar.caption("🧭 Routing: " + " · ".join(
+        f"{row['tier']} {row['questions']}" + (f" ({row['mean_ms']:,.0f} ms avg)" if row["questions"] else "")
+        for row in stats))
+
+def display_telemetry_panel():
+    """Sidebar panel with p50/p95 latency per call kind and telemetry exports"""
+    telemetry = get_telemetry()
+    summary = telemetry.summary()
+    with st.sidebar.expander("📡 LLM Telemetry", expanded=False):
+        if not summary:
+            st.caption("No LLM calls recorded yet.")
+            return
+        st.caption("Latency (ms) over the recent-call buffer")
+        st.bar_chart({
+            "p50": {row["kind"]: row["p50_ms"] for row in summary},
+            "p95": {row["kind"]: row["p95_ms"] for row in summary},
+        }, stack=False)
+        ttfb = [row for row in summary if row["ttfb_p50_ms"] is not None]
+        if ttfb:
+            st.caption("Time to first byte (ms)")
+            st.bar_chart({
+                "p50": {row["kind"]: row["ttfb_p50_ms"] for row in ttfb},
+                "p95": {row["kind"]: row["ttfb_p95_ms"] for row in ttfb},
+            }, stack=False)
+        st.dataframe(
+            [{"Kind": row["kind"], "Calls": row["calls"], "Prompt tok": row["prompt_tokens"],
+              "Completion tok": row["completion_tokens"], "Retries": row["retries"],
+              "Cache hits": row["cache_hits"], "Errors": row["errors"], "Cost $": round(row["cost_usd"], 4)}
+             for row in summary],
+            hide_index=True,
+        )
+        col1, col2 = st.columns(2)
+        col1.download_button("⬇️ JSONL", telemetry.to_jsonl(), file_name="llm_calls.jsonl",
+                             mime="application/jsonl")
+        col2.download_button("⬇️ Prometheus", telemetry.to_prometheus(), file_name="llm_metrics.prom",
+                             mime="text/plain")
+
 def display_product_overview():
     """Display product cards with business information"""
     st.subheader("📊 OptimAIze Product Portfolio")
     
     cols = st.columns(2)
-    for idx, product in enumerate(PRODUCT_DATA["products"]):
+    for idx, record in enumerate(get_product_table(get_catalog())):
         with cols[idx % 2]:
-            with st.expander(f"### {product['name']}", expanded=False):
-                st.write(f"**Description:** {product['description']}")
+            with st.expander(f"### {record.name}", expanded=False):
+                st.write(f"**Description:** {record.description}")
                 
                 st.write("**🎯 Target Markets:**")
-                st.info(product['business_context']['target_market'])
+                st.info(record.target_market)
                 
                 st.write("**💰 Revenue Models:**")
-                st.success(product['business_context']['revenue_model'])
+                st.success(record.revenue_model)
                 
                 st.write("**📈 Business Impact:**")
-                st.success(product['business_context']['business_impact'])
+                st.success(record.business_impact)
                 
                 st.write("**⚡ Key Features:**")
-                for feature in product['features']:
+                for feature in record.features:
                     st.write(f"• {feature}")
                 
                 st.write("**⚠️ Key Challenges:**")
-                st.warning(product['business_context']['challenges'])
+                st.warning(record.challenges)
 
 def display_business_metrics():
     """Display business metrics dashboard"""
     st.subheader("📈 Business Performance Dashboard")
     
     # Create metrics for each product
-    for product in PRODUCT_DATA["products"]:
-        with st.expander(f"{product['name']} - Key Metrics", expanded=False):
+    for record in get_product_table(get_catalog()):
+        with st.expander(f"{record.name} - Key Metrics", expanded=False):
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                st.metric("🎯 Target Markets", 
-                         value=len(product['business_context']['target_market'].split(", ")))
+                st.metric("🎯 Target Markets", value=len(record.target_markets))
             
             with col2:
-                st.metric("💰 Revenue Streams", 
-                         value=len(product['business_context']['revenue_model'].split(", ")))
+                st.metric("💰 Revenue Streams", value=len(record.revenue_models))
             
             with col3:
-                st.metric("📊 KPIs Tracked", 
-                         value=len(product['business_context']['kpis']))
+                st.metric("📊 KPIs Tracked", value=len(record.kpis))
             
             # Display KPIs
             st.write("**📋 Key Performance Indicators:**")
-            for kpi in product['business_context']['kpis']:
+            for kpi in record.kpis:
                 st.write(f"• {kpi}")
             
             # Display Growth Metrics
             st.write("**📈 Growth Metrics:**")
-            st.info(product['business_context']['growth_metrics'])
+            st.info(record.growth_metrics)
             
             # Display Competitive Advantage
             st.write("**🏆 Competitive Advantage:**")
-            st.success(product['business_context']['competitive_advantage'])
+            st.success(record.competitive_advantage)
 
 def display_quick_comparison():
     """Display quick comparison table"""
     st.subheader("⚖️ Product Comparison")
     
+    table = get_product_table(get_catalog())
+    rank_by = st.selectbox("Rank by", ["Catalog order"] + list(IMPACT_CATEGORIES) + list(COUNT_SORT_KEYS),
+                           key="comparison_rank_by")
+    
+    # Cost reduction is always shown; ranking by another impact category adds its column
+    impact_columns = ["Cost reduction"]
+    if rank_by in IMPACT_CATEGORIES and rank_by not in impact_columns:
+        impact_columns.append(rank_by)
     comparison_data = []
-    for product in PRODUCT_DATA["products"]:
-        comparison_data.append({
-            "Product": product["name"],
-            "Target Market": product["business_context"]["target_market"].split(", ")[0],
-            "Key Impact": product["business_context"]["business_impact"].split(",")[0],
-            "Revenue Model": product["business_context"]["revenue_model"].split(", ")[0],
-            "Cost Reduction": extract_percentage(product["business_context"]["business_impact"])
-        })
+    for record in table.sorted_by(rank_by):
+        row = {
+            "Product": record.name,
+            "Target Market": record.target_markets[0] if record.target_markets else "N/A",
+            "Key Impact": record.primary_impact,
+            "Revenue Model": record.revenue_models[0] if record.revenue_models else "N/A",
+        }
+        for category in impact_columns:
+            best = record.best_impact(category)
+            row[category] = best.label if best else "N/A"
+        comparison_data.append(row)
     
     st.table(comparison_data)
 
-def extract_percentage(impact_text):
-    """Extract percentage from business impact text"""
-    import re
-    percentages = re.findall(r'(\d+%)', impact_text)
-    return percentages[0] if percentages else "N/A"
-
 def create_unique_key(text):
     """Create a unique key from text using hash"""
     return hashlib.md5(text.encode()).hexdigest()[:8]
 
+def answer_question(client, session, question, spinner_text):
+    """Add a question and its streamed answer to the chat"""
+    session.append("user", question)
+    # session.messages is only the in-memory tail of the conversation
+    history_window = get_history_window()
+    # A resumed conversation (reload, restart): summarize the log before the tail, a page at a time
+    while history_window.folded < session.offset:
+        page = session.read(history_window.folded, min(session.offset, history_window.folded + CHAT_PAGE_SIZE))
+        if not page:
+            break
+        history_window.fold_earlier(page)
+    history_window.offset = session.offset
+    with st.chat_message("user"):
+        st.markdown(question)
+    
+    with st.chat_message("assistant"):
+        if st.session_state.get("structured_analysis", False):
+            response, data = render_structured_answer(client, question, session.messages, spinner_text)
+        else:
+            response, data = render_business_analysis(client, question, session.messages, spinner_text), None
+    session.append("assistant", response, data=data)
+    # Keep what the window still sends verbatim; everything older is in its summary and the log
+    session.trim(history_window.folded)
+
+@render_region("chat")
+def chat_region(client):
+    """Chat history, the pending suggested question and the chat input"""
+    session = get_chat_session()
+    display_chat_history(session)
+    
+    # Set by a suggested-question button in the sidebar
+    if pending := st.session_state.pop("pending_question", None):
+        answer_question(client, session, pending, "Analyzing business data...")
+    
+    if client:
+        if prompt := st.chat_input("Ask about business insights, comparisons, or recommendations..."):
+            answer_question(client, session, prompt, "Analyzing business implications...")
+
+@render_region("dashboards")
+def dashboards_region(client):
+    """Product overview, comparison and metrics dashboards"""
+    if client:
+        display_product_overview()
+        display_quick_comparison()
+        display_business_metrics()
+    else:
+        # Show product info even without API
+        st.warning("⚠️ **OpenAI API key is required for the chatbot functionality**")
+        st.info("Please configure your API key in the sidebar to enable business analysis and chat features.")
+        
+        # Still display static information
+        display_product_overview()
+        display_business_metrics()
+
+@contextmanager
+def timed_phase(phases, name):
+    """Record how long a block took, in ms, under ``name``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = (time.perf_counter() - start) * 1000
+
+def display_startup_profile(phases):
+    """Show and log per-phase timings of this run and of the session's first run"""
+    if "startup_profile_first_run" not in st.session_state:
+        st.session_state.startup_profile_first_run = dict(phases)
+    first = st.session_state.startup_profile_first_run
+    logging.getLogger("startup").info(
+        "run phases: %s", ", ".join(f"{name}={ms:.1f}ms" for name, ms in phases.items()))
+    with st.sidebar.expander("⏱️ Startup profile"):
+        st.dataframe(
+            [{"Phase": name, "First run (ms)": round(first.get(name, 0.0), 1), "This run (ms)": round(ms, 1)}
+             for name, ms in phases.items()],
+            hide_index=True,
+        )
+
 def main():
     """Main Streamlit app"""
     st.set_page_config(
@@ -355,16 +846,34 @@ def main():
         page_icon="📊",
         layout="wide"
     )
+    configure_logging()
+    
+    # imports, env and the rest of the module body (definitions, page config) run before main's own phases
+    phases = {"imports": IMPORTS_MS, "env": ENV_MS,
+              "module": (time.perf_counter() - RUN_STARTED) * 1000 - IMPORTS_MS - ENV_MS}
+    
+    with timed_phase(phases, "catalog"):
+        try:
+            get_product_table(get_catalog())
+        except CatalogError as e:
+            st.error(f"❌ Could not load the product catalog: {e}")
+            st.stop()
     
     # Sidebar
     st.sidebar.title("🔧 Configuration")
     
+    if get_catalog_loader().error:
+        st.sidebar.warning(f"⚠️ {get_catalog_loader().error}")
+    
     # Display environment info
     env_status = "✅ .env file loaded" if os.path.exists('.env') else "⚠️ No .env file found"
     st.sidebar.info(env_status)
     
-    # Initialize OpenAI client
-    client = setup_openai()
+    # Initialize OpenAI client (openai itself is imported on first use)
+    with timed_phase(phases, "client"):
+        client = setup_openai()
+    layout_started = time.perf_counter()
+    connection_status = st.sidebar.empty()
     
     # Main title
     st.title("🤖 OptimAIze Business Analysis Chatbot")
@@ -373,25 +882,20 @@ def main():
     All responses are **non-technical** and focused on **business value**.
     """)
     
-    # Initialize chat history
-    if "messages" not in st.session_state:
-        st.session_state.messages = [
-            {"role": "assistant", "content": "Hello! I'm your Business Analysis Assistant. I can help you analyze OptimAIze products from a business perspective. Ask me about product comparisons, revenue models, target markets, or business impact!"}
-        ]
-    
-    # Display chat messages
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-    
     # Quick Actions in Sidebar
     st.sidebar.subheader("🚀 Quick Actions")
     
+    st.sidebar.toggle("⚡ Stream responses", value=True, key="stream_responses")
+    st.sidebar.toggle("🧩 Parallel per-product analysis for comparisons", value=False, key="fanout_analysis",
+                      help="Analyze each product concurrently, then merge the results")
+    st.sidebar.toggle("📊 Structured scores and charts", value=False, key="structured_analysis",
+                      help="Score and rank the products as JSON, shown as a chart and tables")
+    
     if st.sidebar.button("🔄 Clear Chat History", key="clear_chat"):
-        st.session_state.messages = [
-            {"role": "assistant", "content": "Chat history cleared! How can I help you with business analysis today?"}
-        ]
-        st.rerun()
+        session = get_chat_session()
+        session.clear()
+        session.append("assistant", "Chat history cleared! How can I help you with business analysis today?")
+        st.session_state.chat_messages_shown = CHAT_PAGE_SIZE
     
     # Suggested questions with unique keys
     st.sidebar.subheader("💡 Suggested Business Questions")
@@ -411,52 +915,34 @@ def main():
         unique_key = f"btn_{create_unique_key(question)}"
         if st.sidebar.button(f"❓ {question}", key=unique_key):
             if client:
-                st.session_state.messages.append({"role": "user", "content": question})
-                with st.chat_message("user"):
-                    st.markdown(question)
-                
-                with st.chat_message("assistant"):
-                    with st.spinner("Analyzing business data..."):
-                        response = get_business_analysis(client, question, st.session_state.messages)
-                        st.markdown(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
+                # Answered by the chat region below
+                st.session_state.pending_question = question
             else:
                 st.sidebar.error("Please configure OpenAI API key first")
     
-    # Main content area
-    if client:
-        # Product Overview Section
-        display_product_overview()
-        
-        # Quick Comparison
-        display_quick_comparison()
-        
-        # Business Metrics Section
-        display_business_metrics()
-        
-        # Chat input
-        if prompt := st.chat_input("Ask about business insights, comparisons, or recommendations..."):
-            # Add user message to chat history
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            with st.chat_message("user"):
-                st.markdown(prompt)
-            
-            # Get and display assistant response
-            with st.chat_message("assistant"):
-                with st.spinner("Analyzing business implications..."):
-                    response = get_business_analysis(client, prompt, st.session_state.messages)
-                    st.markdown(response)
-            
-            # Add assistant response to chat history
-            st.session_state.messages.append({"role": "assistant", "content": response})
-    else:
-        # Show product info even without API
-        st.warning("⚠️ **OpenAI API key is required for the chatbot functionality**")
-        st.info("Please configure your API key in the sidebar to enable business analysis and chat features.")
+    phases["layout"] = (time.perf_counter() - layout_started) * 1000
+    
+    # Chat pane first, so the input is usable before the dashboards are built;
+    # the two regions rerun independently of each other
+    with timed_phase(phases, "chat"):
+        chat_region(client)
+    phases["first_render"] = (time.perf_counter() - RUN_STARTED) * 1000
+    with timed_phase(phases, "dashboards"):
+        dashboards_region(client)
+    
+    with timed_phase(phases, "panels"):
+        display_cache_stats()
+        display_scheduler_status()
+        display_routing_status()
+        display_telemetry_panel()
         
-        # Still display static information
-        display_product_overview()
-        display_business_metrics()
+        # Filled in last so a pending probe never holds up the page
+        if client:
+            display_connection_status(connection_status, client)
+    phases["total"] = (time.perf_counter() - RUN_STARTED) * 1000
+    
+    if STARTUP_PROFILE:
+        display_startup_profile(phases)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""Cold start: time until a fresh process has rendered the chat input.
+
+Each sample is a new Python process, as after a deploy or a worker restart.
+It imports streamlit (already loaded in a real server, so reported apart),
+then runs app.py once through AppTest with STARTUP_PROFILE=1 and reports the
+app's own phase timings: module imports, .env loading, the rest of the module
+body, catalog build, client setup, title and sidebar widgets, the chat region
+(first render), dashboards and the sidebar panels.
+
+    python -m benchmarks.bench_cold_start --samples 5 --max-first-render-ms 400
+
+Exits with status 1 when --max-first-render-ms is exceeded, so it can gate a deploy.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from mock_openai_server import start_mock_server
+from telemetry import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+
+PHASES = ("imports", "env", "module", "catalog", "client", "layout", "chat", "first_render", "dashboards", "panels", "total")
+
+
+def measure_once():
+    """One cold run in this process; printed as JSON for the parent"""
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    streamlit_ms = (time.perf_counter() - start) * 1000
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    run_ms = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    print(json.dumps({
+        "streamlit": streamlit_ms,
+        "run": run_ms,
+        "openai_loaded": "openai" in sys.modules,
+        **at.session_state["startup_profile_first_run"],
+    }))
+
+
+def sample(env):
+    output = subprocess.run([sys.executable, "-m", "benchmarks.bench_cold_start", "--child"], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=5, help="fresh processes to start")
+    parser.add_argument("--max-first-render-ms", type=float, help="fail if the p50 time to the chat input exceeds this")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure_once()
+        return
+
+    server = start_mock_server()
+    env = dict(os.environ, OPENAI_API_KEY="mock", OPENAI_BASE_URL=server.base_url, RESPONSE_CACHE_PATH="",
+               SESSION_STORE_URL="memory://", STARTUP_PROFILE="1")
+    samples = [sample(env) for _ in range(args.samples)]
+    server.shutdown()
+
+    print(f"== Cold start over {args.samples} fresh processes ==")
+    print(f"{'streamlit import':<18} p50 {percentile([s['streamlit'] for s in samples], 50):8.1f} ms   "
+          "(already loaded in a running server)")
+    for phase in PHASES:
+        values = [s.get(phase, 0.0) for s in samples]
+        print(f"{phase:<18} p50 {percentile(values, 50):8.1f} ms   max {max(values):8.1f} ms")
+    print(f"{'AppTest run':<18} p50 {percentile([s['run'] for s in samples], 50):8.1f} ms")
+    loaded = sum(s["openai_loaded"] for s in samples)
+    print(f"openai imported by the end of the first run in {loaded}/{args.samples} processes "
+          "(by the background connection probe, after rendering)")
+
+    first_render = percentile([s["first_render"] for s in samples], 50)
+    if args.max_first_render_ms and first_render > args.max_first_render_ms:
+        print(f"FAIL: first render p50 {first_render:.0f} ms > {args.max_first_render_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Map-reduce fan-out vs. one large completion, against the local mock server.
+
+The mock's latency grows with the number of generated tokens, like the real API.
+
+    python -m benchmarks.bench_fanout --token-delay 0.01 --rate-limit-rate 0.1
+"""
+
+import argparse
+import time
+
+from openai import OpenAI
+
+from fanout import run_fanout_analysis
+from mock_openai_server import start_mock_server
+from products import get_catalog
+from prompts import get_cached_system_prompt
+
+QUESTION = "What's the growth potential for each product?"
+
+CATALOG = get_catalog()
+PRODUCT_DATA, CATALOG_VERSION = CATALOG.data, CATALOG.version
+
+
+def single_call(base_url, max_tokens):
+    client = OpenAI(api_key="mock", base_url=base_url)
+    start = time.perf_counter()
+    client.chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": get_cached_system_prompt(PRODUCT_DATA, CATALOG_VERSION).text},
+            {"role": "user", "content": QUESTION},
+        ],
+        max_tokens=max_tokens,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.3, help="mock seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="mock seconds per generated token")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of calls answered with 429")
+    parser.add_argument("--single-tokens", type=int, default=1000)
+    parser.add_argument("--product-tokens", type=int, default=200)
+    parser.add_argument("--synthesis-tokens", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=6)
+    args = parser.parse_args()
+
+    server = start_mock_server(latency=args.latency, token_delay=args.token_delay,
+                               reply_tokens=max(args.single_tokens, args.synthesis_tokens),
+                               rate_limit_rate=args.rate_limit_rate, retry_after=0.2)
+    products = PRODUCT_DATA["products"]
+
+    single_ms = single_call(server.base_url, args.single_tokens)
+    stats = {}
+    run_fanout_analysis("mock", QUESTION, products, base_url=server.base_url, concurrency=args.concurrency,
+                        product_tokens=args.product_tokens, synthesis_tokens=args.synthesis_tokens, stats=stats)
+    server.shutdown()
+
+    slowest = max(stats["product_ms"].values())
+    print(f"Single {args.single_tokens}-token completion: {single_ms / 1000:6.2f} s")
+    print(f"Fan-out over {len(products)} products (concurrency {args.concurrency}):")
+    print(f"  map phase      {stats['map_ms'] / 1000:6.2f} s  (slowest single call {slowest / 1000:.2f} s)")
+    print(f"  synthesis      {stats['synthesis_ms'] / 1000:6.2f} s")
+    print(f"  total          {stats['total_ms'] / 1000:6.2f} s  ({stats['retries']} retries)")
+    print(f"Speedup: {single_ms / stats['total_ms']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
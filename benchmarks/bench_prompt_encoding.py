@@ -0,0 +1,40 @@
+"""Compare system prompt encodings against the original indented JSON dump.
+
+    python -m benchmarks.bench_prompt_encoding
+"""
+
+import json
+import timeit
+
+from products import get_catalog
+from prompts import (PROMPT_ENCODINGS, SYSTEM_PROMPT_TEMPLATE, build_system_prompt,
+                     get_cached_system_prompt, _get_encoder)
+
+CATALOG = get_catalog()
+PRODUCT_DATA, CATALOG_VERSION = CATALOG.data, CATALOG.version
+
+
+def per_call_build():
+    """What get_system_prompt() used to do on every chat turn"""
+    return SYSTEM_PROMPT_TEMPLATE.format(products_data=json.dumps(PRODUCT_DATA, indent=2))
+
+
+def main():
+    tokenizer = "tiktoken" if _get_encoder() is not None else "approximate"
+    print(f"Prompt tokens per request ({tokenizer} tokenizer)\n")
+    baseline = build_system_prompt(PRODUCT_DATA, CATALOG_VERSION, "indented")
+    print(f"{'encoding':<10} {'chars':>7} {'tokens':>7} {'saved':>7} {'saved %':>8}")
+    for encoding in PROMPT_ENCODINGS:
+        prompt = build_system_prompt(PRODUCT_DATA, CATALOG_VERSION, encoding)
+        saved = baseline.token_count - prompt.token_count
+        print(f"{encoding:<10} {len(prompt.text):>7} {prompt.token_count:>7} {saved:>7} "
+              f"{saved / baseline.token_count:>8.1%}")
+
+    runs = 2000
+    rebuild = timeit.timeit(per_call_build, number=runs) / runs * 1e6
+    cached = timeit.timeit(lambda: get_cached_system_prompt(PRODUCT_DATA, CATALOG_VERSION), number=runs) / runs * 1e6
+    print(f"\nPer-turn prompt cost: rebuild {rebuild:.1f} us, cached lookup {cached:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
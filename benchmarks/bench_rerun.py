@@ -0,0 +1,84 @@
+"""Per-rerun render time vs. conversation length, full page vs. fragment regions.
+
+Seeds chat sessions of increasing length, then times reruns of app.py through
+AppTest. AppTest always executes the whole script, so the "fragment" column
+is the chat region's own measured time (st.session_state.render_timings),
+which is what a chat-only fragment rerun executes.
+
+    python -m benchmarks.bench_rerun --lengths 10 50 200 --reruns 5
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from mock_openai_server import start_mock_server
+from session_store import SessionStore, SQLiteBackend
+from telemetry import percentile
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+ANSWER = ("**Revenue model comparison**\n\n"
+          + "\n".join(f"- Product {i}: subscription plus usage-based pricing, strong ROI in {i + 2} months"
+                      for i in range(8)))
+
+
+def seed_session(store_path, length):
+    store = SessionStore(SQLiteBackend(store_path))
+    session_id = store.new_session_id()
+    session = store.get(session_id)
+    for turn in range(length // 2):
+        session.append("user", f"Question {turn}: compare the revenue models?")
+        session.append("assistant", ANSWER)
+    return session_id
+
+
+def time_reruns(session_id, reruns, incremental):
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["INCREMENTAL_RENDERING"] = "1" if incremental else "0"
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.query_params["session"] = session_id
+    at.run()
+    full, regions = [], {}
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        full.append((time.perf_counter() - start) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        for name, ms in at.session_state["render_timings"].items():
+            regions.setdefault(name, []).append(ms)
+    return full, regions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 50, 200], help="messages in the chat")
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+
+    server = start_mock_server()
+    store_path = os.path.join(tempfile.mkdtemp(), "sessions.sqlite3")
+    os.environ.update(OPENAI_API_KEY="mock", OPENAI_BASE_URL=server.base_url, RESPONSE_CACHE_PATH="",
+                      SESSION_STORE_URL=store_path,
+                      # Render the whole conversation, so the cost of long histories shows
+                      CHAT_PAGE_SIZE=str(max(args.lengths)))
+    # Warm up imports and process-wide caches
+    time_reruns(seed_session(store_path, 2), 1, True)
+
+    print(f"{'Messages':>8}  {'Full rerun p50':>15}  {'Chat region p50':>16}  {'Dashboards p50':>15}  "
+          f"{'Fragment rerun saves':>20}")
+    for length in args.lengths:
+        session_id = seed_session(store_path, length)
+        full, _ = time_reruns(session_id, args.reruns, incremental=False)
+        _, regions = time_reruns(session_id, args.reruns, incremental=True)
+        full_ms, chat_ms = percentile(full, 50), percentile(regions["chat"], 50)
+        print(f"{length:>8}  {full_ms:>12.1f} ms  {chat_ms:>13.1f} ms  "
+              f"{percentile(regions['dashboards'], 50):>12.1f} ms  {1 - chat_ms / full_ms:>19.0%}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Relevance and prompt-size benchmark for catalog retrieval vs. full catalog stuffing.
+
+    python -m benchmarks.bench_retrieval
+"""
+
+from statistics import mean
+
+from products import get_catalog
+from prompts import build_system_prompt
+from retrieval import CatalogIndex
+
+CATALOG = get_catalog()
+PRODUCT_DATA, CATALOG_VERSION = CATALOG.data, CATALOG.version
+
+BUDDY = "OptimAIze Buddy"
+AUTOMATION = "OptimAIze Automation"
+ASSIST = "OptimAIze Assist"
+GRADER = "OptimAIze Grader"
+PID_READER = "OptimAIze PID Reader"
+PRICE_PREDICTOR = "OptimAIze Price Predictor"
+
+# (question, products a good answer must be able to draw on)
+LABELED_QUERIES = [
+    ("Which product is best for healthcare industry?", {BUDDY}),
+    ("What are the KPIs of OptimAIze Grader?", {GRADER}),
+    ("What helps banks automate compliance document checks?", {AUTOMATION}),
+    ("How can we reduce equipment downtime for field technicians?", {ASSIST}),
+    ("Which product suits universities that need to grade exams faster?", {GRADER}),
+    ("Can we review P&ID engineering drawings before construction?", {PID_READER}),
+    ("Predict used car prices for automotive dealers", {PRICE_PREDICTOR}),
+    ("Which product works for insurance companies?", {AUTOMATION, PRICE_PREDICTOR}),
+    ("What do we offer oil & gas operators?", {ASSIST, PID_READER}),
+    ("We need multilingual customer support for a government portal", {BUDDY}),
+    ("How do we cut manual review in legal workflows?", {AUTOMATION}),
+    ("Pricing insights for e-commerce platforms", {PRICE_PREDICTOR}),
+    ("Which product helps telecommunications engineers troubleshoot?", {ASSIST}),
+    ("What is the revenue model of OptimAIze Buddy?", {BUDDY}),
+    ("Compare all revenue models", {p["name"] for p in PRODUCT_DATA["products"]}),
+    ("What are the main business challenges?", {p["name"] for p in PRODUCT_DATA["products"]}),
+]
+
+
+def main(k=3):
+    index = CatalogIndex(PRODUCT_DATA)
+    full = build_system_prompt(PRODUCT_DATA, CATALOG_VERSION)
+
+    ranking_recall, reciprocal_ranks, prompt_recall, prompt_tokens = [], [], [], []
+    print(f"{'question':<66} {'products sent':>13} {'recall':>7} {'tokens':>7}")
+    for question, relevant in LABELED_QUERIES:
+        ranked = [product["name"] for product, _ in index.search(question, k=len(index.products))]
+        ranking_recall.append(len(relevant & set(ranked[:k])) / len(relevant))
+        first = next((rank for rank, name in enumerate(ranked, 1) if name in relevant), None)
+        reciprocal_ranks.append(1 / first if first else 0.0)
+
+        selected = index.select_products(question, k)
+        names = tuple(product["name"] for product in selected) if selected else ()
+        prompt = build_system_prompt(PRODUCT_DATA, CATALOG_VERSION, product_names=names)
+        sent = set(names) if names else {p["name"] for p in PRODUCT_DATA["products"]}
+        recall = len(relevant & sent) / len(relevant)
+        prompt_recall.append(recall)
+        prompt_tokens.append(prompt.token_count)
+        label = str(len(names)) if names else "all"
+        print(f"{question[:66]:<66} {label:>13} {recall:>7.0%} {prompt.token_count:>7}")
+
+    print(f"\nRanking recall@{k}: {mean(ranking_recall):.0%}   MRR: {mean(reciprocal_ranks):.2f}")
+    print(f"Prompt recall (relevant products sent in full): retrieval {mean(prompt_recall):.0%}, "
+          f"full stuffing 100%")
+    saved = 1 - mean(prompt_tokens) / full.token_count
+    print(f"Mean system prompt tokens: retrieval {mean(prompt_tokens):.0f}, "
+          f"full stuffing {full.token_count} ({saved:.0%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Routing accuracy on a labeled question set, and classification time.
+
+Catalog-tier answers are canned text with no model call, so a question routed
+there by mistake gets a wrong answer rather than a slower one. Exits with
+status 1 on any misroute, so a change to the rules or ROUTING_CONFIG can be
+checked before it ships.
+
+    python -m benchmarks.bench_routing
+"""
+
+import sys
+import time
+from statistics import median
+
+from products import get_catalog
+from routing import TIERS, Router
+
+# (question, expected tier)
+LABELED_QUERIES = [
+    # Plain lookups of one field of one product
+    ("What are the KPIs of OptimAIze Grader?", "catalog"),
+    ("What is the revenue model of OptimAIze Buddy?", "catalog"),
+    ("List the features of OptimAIze Assist", "catalog"),
+    ("What are the target markets for OptimAIze PID Reader?", "catalog"),
+    ("What is the business impact of OptimAIze Buddy?", "catalog"),
+    ("What are OptimAIze Grader's growth metrics?", "catalog"),
+    ("What are the main challenges of OptimAIze Automation?", "catalog"),
+    ("What is OptimAIze Price Predictor?", "catalog"),
+    ("Describe OptimAIze Assist", "catalog"),
+    ("Grader KPIs", "catalog"),
+    # About one product, but asking for more than a stored field
+    ("What's the growth potential of OptimAIze Grader?", "small"),
+    ("How much growth can OptimAIze Grader achieve next year?", "small"),
+    ("What does OptimAIze Automation cost?", "small"),
+    ("What is the impact of OptimAIze Buddy on customer satisfaction?", "small"),
+    ("What are the main risks of OptimAIze Buddy for hospitals?", "small"),
+    ("What KPIs should a university track for OptimAIze Grader?", "small"),
+    ("Is OptimAIze PID Reader a good fit for a small engineering firm?", "small"),
+    ("Why would a bank choose OptimAIze Automation?", "small"),
+    ("How does OptimAIze Assist reduce equipment downtime?", "small"),
+    ("What does OptimAIze Buddy do for government portals?", "small"),
+    # Comparisons and portfolio-wide questions
+    ("Which product has the highest ROI?", "full"),
+    ("Compare all revenue models", "full"),
+    ("Which product is best for healthcare industry?", "full"),
+    ("What are the main business challenges?", "full"),
+    ("Compare OptimAIze Grader and OptimAIze Buddy", "full"),
+    ("What are the KPIs of every product?", "full"),
+    ("How do KPIs differ across products?", "full"),
+]
+
+
+def main():
+    router = Router(get_catalog().products)
+    misroutes = []
+    counts = {tier: [0, 0] for tier in TIERS}
+    timings = []
+    print(f"{'question':<66} {'expected':>8} {'routed':>8}  reason")
+    for question, expected in LABELED_QUERIES:
+        start = time.perf_counter()
+        decision = router.classify(question)
+        timings.append((time.perf_counter() - start) * 1e6)
+        counts[expected][1] += 1
+        if decision.tier == expected:
+            counts[expected][0] += 1
+        else:
+            misroutes.append((question, expected, decision))
+        mark = "" if decision.tier == expected else "  <-- misrouted"
+        print(f"{question[:66]:<66} {expected:>8} {decision.tier:>8}  {decision.reason}{mark}")
+
+    print("\n" + "   ".join(f"{tier}: {right}/{total}" for tier, (right, total) in counts.items())
+          + f"   classify p50 {median(timings):.0f} µs")
+    if misroutes:
+        print(f"FAIL: {len(misroutes)} of {len(LABELED_QUERIES)} questions misrouted")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
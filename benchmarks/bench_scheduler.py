@@ -0,0 +1,119 @@
+"""Request scheduler vs. uncoordinated calls, against the mock server's RPM limit.
+
+The mock enforces --rpm over a short --rpm-window, so a burst above the budget
+is rejected within seconds rather than after a minute.
+
+1. A burst of concurrent requests sent directly (no SDK retries) vs. through
+   a RequestScheduler with the same RPM budget: failed requests and wall time.
+2. Batch work queued ahead of interactive requests: time each class waits.
+3. Identical concurrent requests: API calls actually made (single-flight).
+
+    python -m benchmarks.bench_scheduler --rpm 600 --requests 60
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import OpenAI, RateLimitError
+
+from mock_openai_server import start_mock_server
+from scheduler import BATCH, INTERACTIVE, RequestScheduler
+from telemetry import CallRecord, percentile
+
+
+def make_request(i):
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [{"role": "user", "content": f"Question {i}: which product has the highest ROI?"}],
+        "max_tokens": 50,
+    }
+
+
+def burst(server, rpm, requests, scheduler=None):
+    client = OpenAI(api_key="mock", base_url=server.base_url, max_retries=0)
+    start_count = server.options.counters["rate_limited"]
+
+    def send(i):
+        request = make_request(i)
+        try:
+            if scheduler is None:
+                client.chat.completions.create(**request)
+            else:
+                scheduler.submit(lambda: client.chat.completions.create(**request), request)
+            return True
+        except RateLimitError:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=requests) as pool:
+        results = list(pool.map(send, range(requests)))
+    return results.count(False), server.options.counters["rate_limited"] - start_count, time.perf_counter() - start
+
+
+def priorities(server, rpm, requests):
+    client = OpenAI(api_key="mock", base_url=server.base_url, max_retries=0)
+    scheduler = RequestScheduler(requests_per_minute=rpm, burst_seconds=1)
+    waits = {INTERACTIVE: [], BATCH: []}
+
+    def send(i, priority):
+        request = make_request(i)
+        call = CallRecord(kind="bench", model=request["model"], started_at=time.time())
+        scheduler.submit(lambda: client.chat.completions.create(**request), request, priority, call=call)
+        waits[priority].append(call.queue_ms)
+
+    with ThreadPoolExecutor(max_workers=2 * requests) as pool:
+        # The batch backlog arrives first; interactive users show up right after
+        for i in range(requests):
+            pool.submit(send, i, BATCH)
+        time.sleep(0.05)
+        for i in range(requests, requests + requests // 4):
+            pool.submit(send, i, INTERACTIVE)
+    return waits
+
+
+def single_flight(server, copies):
+    client = OpenAI(api_key="mock", base_url=server.base_url, max_retries=0)
+    scheduler = RequestScheduler(requests_per_minute=0)
+    request = make_request(0)
+    before = server.options.counters["requests"]
+    with ThreadPoolExecutor(max_workers=copies) as pool:
+        list(pool.map(lambda _: scheduler.submit(lambda: client.chat.completions.create(**request), request),
+                      range(copies)))
+    return server.options.counters["requests"] - before, scheduler.counters["deduplicated"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=int, default=600, help="mock and scheduler requests-per-minute budget")
+    parser.add_argument("--rpm-window", type=float, default=2.0, help="seconds the mock enforces the RPM over")
+    parser.add_argument("--requests", type=int, default=60, help="concurrent requests per burst")
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = start_mock_server(latency=args.latency, requests_per_minute=args.rpm, rpm_window=args.rpm_window)
+
+    print(f"== Burst of {args.requests} requests, mock limit {args.rpm} RPM over {args.rpm_window:g} s ==")
+    failed, rejected, elapsed = burst(server, args.rpm, args.requests)
+    print(f"Direct      {failed:3d} failed   {rejected:3d} 429s   {elapsed:6.2f} s")
+    time.sleep(args.rpm_window)
+    scheduler = RequestScheduler(requests_per_minute=args.rpm, burst_seconds=args.rpm_window / 2)
+    failed, rejected, elapsed = burst(server, args.rpm, args.requests, scheduler)
+    print(f"Scheduled   {failed:3d} failed   {rejected:3d} 429s   {elapsed:6.2f} s   "
+          f"({scheduler.counters['retries']} retries)")
+
+    time.sleep(args.rpm_window)
+    waits = priorities(server, args.rpm, args.requests)
+    print(f"\n== {args.requests} batch requests queued ahead of {args.requests // 4} interactive ones ==")
+    for priority, label in ((INTERACTIVE, "Interactive"), (BATCH, "Batch")):
+        print(f"{label:<12} queue wait p50 {percentile(waits[priority], 50):8.0f} ms   "
+              f"p95 {percentile(waits[priority], 95):8.0f} ms")
+
+    time.sleep(args.rpm_window)
+    calls, shared = single_flight(server, 10)
+    print(f"\n== 10 identical concurrent requests ==\nAPI calls made {calls}, answered from a shared call {shared}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
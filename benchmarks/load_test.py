@@ -0,0 +1,189 @@
+"""Offline load test of app.py against the local mock OpenAI server.
+
+Two phases, neither of which spends API credits:
+
+1. N concurrent chat sessions calling get_business_analysis() (or the
+   streaming variant) directly: throughput, tail latency, errors.
+2. N concurrent Streamlit sessions driving the full main() rerun cycle
+   through AppTest: per-rerun render time and memory per session.
+
+    python -m benchmarks.load_test --sessions 20 --turns 5 --latency 0.2 --token-delay 0.002
+    python -m benchmarks.load_test --rpm 120 --error-rate 0.02 --max-p95-ms 3000 --max-rerun-p95-ms 800
+
+Exits with status 1 when a --max-* threshold is exceeded, so it can gate a deploy.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_openai_server import start_mock_server
+from telemetry import percentile
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+QUESTIONS = [
+    "Which product has the highest ROI?",
+    "Compare all revenue models",
+    "Which product is best for healthcare industry?",
+    "What are the main business challenges?",
+    "How do KPIs differ across products?",
+    "Which product reduces costs the most?",
+    "Compare target markets for all products",
+    "What's the growth potential for each product?",
+]
+
+GREETING = {"role": "assistant", "content": "Hello! I'm your Business Analysis Assistant."}
+
+
+def describe(label, values, unit="ms"):
+    return (f"{label:<22} p50 {percentile(values, 50):8.1f} {unit}   p95 {percentile(values, 95):8.1f} {unit}   "
+            f"p99 {percentile(values, 99):8.1f} {unit}   max {max(values):8.1f} {unit}")
+
+
+def run_chat_session(app, client, session_id, turns, stream):
+    """One simulated user asking ``turns`` questions in a row"""
+    history = [dict(GREETING)]
+    window = app.HistoryWindow(app.HISTORY_TOKEN_BUDGET, app.SUMMARY_TOKEN_BUDGET)
+    latencies, errors = [], 0
+    for turn in range(turns):
+        question = QUESTIONS[(session_id + turn) % len(QUESTIONS)]
+        history.append({"role": "user", "content": question})
+        start = time.perf_counter()
+        if stream:
+            answer = "".join(app.stream_business_analysis(client, question, history, {}, window))
+        else:
+            answer = app.get_business_analysis(client, question, history, window)
+        latencies.append((time.perf_counter() - start) * 1000)
+        errors += "Error in business analysis" in answer
+        history.append({"role": "assistant", "content": answer})
+    return latencies, errors
+
+
+def chat_phase(args):
+    import app
+    from openai import OpenAI
+
+    client = OpenAI(api_key="mock", base_url=os.environ["OPENAI_BASE_URL"])
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        results = list(pool.map(
+            lambda session_id: run_chat_session(app, client, session_id, args.turns, args.stream),
+            range(args.sessions),
+        ))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for session, _ in results for latency in session]
+    errors = sum(session_errors for _, session_errors in results)
+
+    mode = "streaming" if args.stream else "blocking"
+    print(f"\n== get_business_analysis ({mode}): {args.sessions} sessions x {args.turns} turns ==")
+    print(f"Throughput             {len(latencies) / elapsed:8.2f} turns/s over {elapsed:.1f} s")
+    print(describe("Turn latency", latencies))
+    print(f"Error replies          {errors} of {len(latencies)}")
+    return percentile(latencies, 95)
+
+
+def run_app_session(session_id, reruns):
+    """One simulated browser tab: first load, then ``reruns`` chat turns"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    timings = []
+    start = time.perf_counter()
+    at.run()
+    first_load = (time.perf_counter() - start) * 1000
+    for turn in range(reruns):
+        at.chat_input[0].set_value(QUESTIONS[(session_id + turn) % len(QUESTIONS)])
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+        if at.exception:
+            raise RuntimeError(f"Session {session_id} raised: {at.exception[0].message}")
+    return first_load, timings, at
+
+
+def app_phase(args):
+    # Warm up imports and process-wide caches so they are not billed to the first session
+    run_app_session(0, 1)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.app_sessions) as pool:
+        results = list(pool.map(lambda session_id: run_app_session(session_id, args.reruns),
+                                range(args.app_sessions)))
+    elapsed = time.perf_counter() - start
+    first_loads = [first_load for first_load, _, _ in results]
+    reruns = [timing for _, timings, _ in results for timing in timings]
+    del results
+
+    # Memory is measured separately: tracemalloc would distort the timings above
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    sessions = [run_app_session(session_id, args.reruns)[2] for session_id in range(args.memory_sessions)]
+    gc.collect()
+    per_session_kb = (tracemalloc.get_traced_memory()[0] - baseline) / len(sessions) / 1024
+    tracemalloc.stop()
+    del sessions
+
+    print(f"\n== main() via AppTest: {args.app_sessions} concurrent sessions x {args.reruns} chat reruns ==")
+    print(f"Throughput             {len(reruns) / elapsed:8.2f} reruns/s over {elapsed:.1f} s")
+    print(describe("First page load", first_loads))
+    print(describe("Chat rerun (incl. LLM)", reruns))
+    print(f"Memory per session     {per_session_kb:8.1f} KiB (after {args.reruns} turns, "
+          f"{args.memory_sessions} sessions)")
+    return percentile(reruns, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent chat sessions")
+    parser.add_argument("--turns", type=int, default=5, help="questions per chat session")
+    parser.add_argument("--stream", action="store_true", help="use the streaming call")
+    parser.add_argument("--app-sessions", type=int, default=4, help="concurrent AppTest sessions (0 = skip)")
+    parser.add_argument("--reruns", type=int, default=5, help="chat turns per AppTest session")
+    parser.add_argument("--memory-sessions", type=int, default=3, help="sessions kept alive for the memory check")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--latency-jitter", type=float, default=0.1)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--reply-tokens", type=int, default=200)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=0, help="mock requests-per-minute limit")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-p95-ms", type=float, help="fail if chat turn p95 exceeds this")
+    parser.add_argument("--max-rerun-p95-ms", type=float, help="fail if AppTest rerun p95 exceeds this")
+    args = parser.parse_args()
+
+    server = start_mock_server(
+        latency=args.latency, latency_jitter=args.latency_jitter, token_delay=args.token_delay,
+        reply_tokens=args.reply_tokens, rate_limit_rate=args.rate_limit_rate, retry_after=0.1,
+        error_rate=args.error_rate, requests_per_minute=args.rpm,
+    )
+    # Every turn must reach the mock server, so the on-disk answer cache is off; sessions stay in
+    # memory rather than in the working directory's .cache/sessions.sqlite3
+    os.environ.update(OPENAI_API_KEY="mock", OPENAI_BASE_URL=server.base_url, RESPONSE_CACHE_PATH="",
+                      SESSION_STORE_URL="memory://")
+
+    failures = []
+    chat_p95 = chat_phase(args)
+    if args.max_p95_ms and chat_p95 > args.max_p95_ms:
+        failures.append(f"chat turn p95 {chat_p95:.0f} ms > {args.max_p95_ms:.0f} ms")
+    if args.app_sessions:
+        rerun_p95 = app_phase(args)
+        if args.max_rerun_p95_ms and rerun_p95 > args.max_rerun_p95_ms:
+            failures.append(f"rerun p95 {rerun_p95:.0f} ms > {args.max_rerun_p95_ms:.0f} ms")
+
+    counters = server.options.counters
+    print(f"\nMock server: {counters['requests']} requests, {counters['rate_limited']} rate limited, "
+          f"{counters['errors']} server errors")
+    server.shutdown()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
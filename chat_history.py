@@ -0,0 +1,106 @@
+"""Token-budgeted chat history for completion requests.
+
+Only the most recent turns that fit the budget are sent verbatim; older turns
+are folded, once, into a short rolling summary kept with the window.
+"""
+
+import re
+from functools import lru_cache
+
+from prompts import count_tokens
+
+# Per-message overhead the chat format adds on top of the content tokens
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_MARKDOWN = re.compile(r"[*_`#>|]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+@lru_cache(maxsize=4096)
+def message_tokens(content):
+    """Prompt tokens for one chat message"""
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _gist(content, limit=160):
+    """First sentence of a message, without markdown, as a summary line"""
+    text = " ".join(_MARKDOWN.sub("", content).split())
+    text = _SENTENCE_END.split(text, maxsplit=1)[0]
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+class HistoryWindow:
+    """Sliding window over one conversation with a rolling summary of older turns"""
+
+    def __init__(self, budget_tokens=2000, summary_tokens=300):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.summary_lines = []
+        # Log position of chat_history[0], for callers that keep only the tail of a conversation
+        self.offset = 0
+        # Log position of the first message not folded into the summary, and the tokens folded so far
+        self.folded = 0
+        self.folded_tokens = 0
+
+    @property
+    def summary(self):
+        return "\n".join(self.summary_lines)
+
+    def _fold(self, messages):
+        for message in messages:
+            self.folded_tokens += message_tokens(message["content"])
+            speaker = "User asked" if message["role"] == "user" else "Assistant answered"
+            self.summary_lines.append(f"- {speaker}: {_gist(message['content'])}")
+        # The summary itself stays bounded: the oldest lines go first
+        while len(self.summary_lines) > 1 and count_tokens(self.summary) > self.summary_tokens:
+            self.summary_lines.pop(0)
+
+    def fold_earlier(self, messages):
+        """Fold the log messages right after ``folded`` that the window never saw (a resumed conversation)"""
+        messages = list(messages)
+        self._fold(messages)
+        self.folded += len(messages)
+
+    def build(self, chat_history, user_message):
+        """Return (messages, stats) to send for this turn, excluding the system prompt"""
+        history = list(chat_history)
+        # The caller usually has already appended the current prompt
+        if history and history[-1]["role"] == "user" and history[-1]["content"] == user_message:
+            history.pop()
+        offset = self.offset
+        end = offset + len(history)
+        if end < self.folded:
+            # The chat was cleared, start over
+            self.summary_lines, self.folded, self.folded_tokens = [], 0, 0
+        # Messages that left the caller's tail before they were folded can no longer be summarized
+        self.folded = max(self.folded, offset)
+
+        budget = self.budget_tokens - message_tokens(user_message)
+        start = end
+        used = 0
+        while start > self.folded and used + message_tokens(history[start - 1 - offset]["content"]) <= budget:
+            start -= 1
+            used += message_tokens(history[start - offset]["content"])
+        if start > self.folded:
+            self._fold(history[self.folded - offset:start - offset])
+            self.folded = start
+
+        messages = []
+        summary_used = 0
+        if self.summary_lines:
+            summary = f"Summary of the earlier conversation:\n{self.summary}"
+            summary_used = message_tokens(summary)
+            messages.append({"role": "system", "content": summary})
+        messages.extend({"role": m["role"], "content": m["content"]} for m in history[start - offset:])
+        messages.append({"role": "user", "content": user_message})
+
+        stats = {
+            "window_messages": end - start,
+            "folded_messages": self.folded,
+            "history_tokens": used,
+            "summary_tokens": summary_used,
+            "user_tokens": message_tokens(user_message),
+            # What the old code sent: every message of the conversation, plus the current prompt twice
+            "unbounded_tokens": self.folded_tokens + used + 2 * message_tokens(user_message),
+        }
+        return messages, stats
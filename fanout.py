@@ -0,0 +1,117 @@
+"""Map-reduce analysis for portfolio-wide questions.
+
+Instead of one long completion covering every product, each product gets a
+short analysis of its own, run concurrently, and a final call merges them.
+Wall-clock time approaches the slowest single call plus the synthesis.
+Every call goes through the process-wide request scheduler, which queues,
+rate-limits and retries it alongside the rest of the app's traffic.
+"""
+
+import asyncio
+import json
+import time
+
+from scheduler import INTERACTIVE, get_scheduler
+from telemetry import get_telemetry
+
+PRODUCT_ANALYSIS_PROMPT = """You are a Business Analysis Assistant for OptimAIze products.
+Answer the question below for this one product only, in at most 5 short bullet points.
+Be non-technical and focus on business value, ROI, target markets and impact.
+
+Product data:
+{product}"""
+
+SYNTHESIS_PROMPT = """You are a Business Analysis Assistant for OptimAIze products.
+You are given short per-product analyses written for the user's question.
+Merge them into one answer: compare the products directly, highlight which is best for
+which business need, and finish with actionable recommendations.
+Use simple, non-technical language for business executives.
+
+Per-product analyses:
+{analyses}"""
+
+
+async def create_scheduled(client, stats=None, kind="fanout", priority=INTERACTIVE, **request):
+    """Create a chat completion through the shared scheduler, which queues, rate-limits and retries it"""
+    with get_telemetry().track(kind, request.get("model", ""), request.get("messages", ())) as call:
+        try:
+            response = await get_scheduler().submit_async(
+                lambda: client.chat.completions.create(**request), request, priority, call=call)
+        finally:
+            if stats is not None:
+                stats["retries"] = stats.get("retries", 0) + call.retries
+        call.set_usage(response.usage)
+        return response
+
+
+async def _analyze_product(client, semaphore, question, product, model, max_tokens, stats, priority):
+    async with semaphore:
+        start = time.perf_counter()
+        response = await create_scheduled(
+            client,
+            stats=stats,
+            priority=priority,
+            model=model,
+            messages=[
+                {"role": "system", "content": PRODUCT_ANALYSIS_PROMPT.format(
+                    product=json.dumps(product, separators=(",", ":")))},
+                {"role": "user", "content": question},
+            ],
+            temperature=0.7,
+            max_tokens=max_tokens,
+        )
+        stats["product_ms"][product["name"]] = (time.perf_counter() - start) * 1000
+        return product["name"], response.choices[0].message.content
+
+
+async def fanout_analysis(client, question, products, history=(), model="gpt-4o",
+                          concurrency=4, product_tokens=200, synthesis_tokens=400, stats=None,
+                          priority=INTERACTIVE):
+    """Analyze every product concurrently, then merge the analyses into one answer
+
+    ``history`` is a list of chat messages given to the synthesis call only.
+    Fills ``stats`` (if given) with per-product, map, synthesis and total timings
+    and the number of scheduler retries.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(product_ms={}, retries=0)
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(concurrency)
+    analyses = await asyncio.gather(*[
+        _analyze_product(client, semaphore, question, product, model, product_tokens, stats, priority)
+        for product in products
+    ])
+    stats["map_ms"] = (time.perf_counter() - start) * 1000
+
+    synthesis_start = time.perf_counter()
+    merged = "\n\n".join(f"## {name}\n{analysis}" for name, analysis in analyses)
+    response = await create_scheduled(
+        client,
+        stats=stats,
+        kind="synthesis",
+        priority=priority,
+        model=model,
+        messages=[{"role": "system", "content": SYNTHESIS_PROMPT.format(analyses=merged)}]
+                 + list(history)
+                 + [{"role": "user", "content": question}],
+        temperature=0.7,
+        max_tokens=synthesis_tokens,
+    )
+    stats["synthesis_ms"] = (time.perf_counter() - synthesis_start) * 1000
+    stats["total_ms"] = (time.perf_counter() - start) * 1000
+    return response.choices[0].message.content
+
+
+def run_fanout_analysis(api_key, question, products, base_url=None, **options):
+    """Blocking wrapper around fanout_analysis() with its own AsyncOpenAI client
+
+    The async client is tied to the event loop, so it lives only as long as this call.
+    Retries are handled by the shared scheduler rather than the client.
+    """
+    from openai import AsyncOpenAI
+
+    async def run():
+        async with AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0) as client:
+            return await fanout_analysis(client, question, products, **options)
+
+    return asyncio.run(run())
@@ -0,0 +1,322 @@
+"""Headless entry points for bulk business analysis, alongside the Streamlit UI.
+
+Questions are JSONL lines like {"id": "q1", "question": "..."} (a plain JSON
+string or a bare line of text also works; without an id one is derived from
+the question). Results stream back as JSONL in completion order.
+
+    # Run a file through a bounded worker pool, resuming from earlier output
+    python headless.py batch questions.jsonl --out results.jsonl --workers 8
+    cat questions.jsonl | python headless.py batch - --out results.jsonl
+
+    # Prepare (and optionally submit) an OpenAI Batch API job for cheaper bulk pricing;
+    # questions are routed like in the UI, and catalog lookups are answered locally
+    python headless.py openai-batch questions.jsonl --out batch_input.jsonl --submit
+    python headless.py openai-batch-results <batch_id> --out results.jsonl
+
+    # HTTP service (requires fastapi and uvicorn)
+    python headless.py serve --port 8000
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+from openai import OpenAI
+
+import app
+from scheduler import BATCH, INTERACTIVE
+
+ERROR_PREFIX = "Error in business analysis"
+
+
+def question_id(question):
+    """Stable id for a question without one, so reruns can resume"""
+    return "q-" + hashlib.sha1(question.encode()).hexdigest()[:12]
+
+
+def parse_question(line):
+    """Turn one input line into {"id", "question"}, or None for blank lines"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError:
+        item = line
+    if isinstance(item, str):
+        item = {"question": item}
+    if not isinstance(item, dict) or not str(item.get("question", "")).strip():
+        raise ValueError(f"Expected a question, got: {line[:80]}")
+    item["question"] = str(item["question"]).strip()
+    item["id"] = str(item.get("id") or question_id(item["question"]))
+    return item
+
+
+def read_questions(lines):
+    for line in lines:
+        item = parse_question(line)
+        if item is not None:
+            yield item
+
+
+def load_checkpoint(path):
+    """Ids already answered successfully in an existing results file"""
+    done = set()
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a partial last line
+                continue
+            if record.get("id") and not record.get("error"):
+                done.add(record["id"])
+    return done
+
+
+def analyze(client, item, priority=BATCH):
+    """Answer one question with the same prompt and call the UI uses"""
+    start = time.perf_counter()
+    # Batch work queues behind interactive requests in the shared scheduler
+    answer = app.get_business_analysis(client, item["question"], item.get("history", []), priority=priority)
+    failed = answer.startswith(ERROR_PREFIX)
+    return {
+        "id": item["id"],
+        "question": item["question"],
+        "answer": None if failed else answer,
+        "error": answer if failed else None,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "finished_at": time.time(),
+    }
+
+
+def analyze_in_slot(client, item, slots=None):
+    """analyze(), holding one of ``slots`` (a semaphore shared across callers) for the model call"""
+    with slots or nullcontext():
+        return analyze(client, item)
+
+
+def iter_results(client, questions, workers=4, skip=(), slots=None):
+    """Answer questions on a bounded worker pool, yielding results as they finish
+
+    At most ``2 * workers`` questions are in flight, so an endless input stream
+    is read lazily rather than queued up front. With ``slots``, each question
+    also waits for a slot, so concurrent callers share one limit.
+    """
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis") as pool:
+        pending = set()
+        for item in questions:
+            if item["id"] in skip:
+                continue
+            pending.add(pool.submit(analyze_in_slot, client, item, slots))
+            if len(pending) >= 2 * workers:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def get_client():
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        sys.exit("OPENAI_API_KEY is not set (add it to .env or the environment)")
+    return OpenAI(api_key=api_key)
+
+
+def open_input(path):
+    return sys.stdin if path == "-" else open(path, encoding="utf-8")
+
+
+def run_batch(args):
+    done = load_checkpoint(args.out)
+    if done:
+        print(f"Resuming: {len(done)} questions already answered in {args.out}", file=sys.stderr)
+    client = get_client()
+    count = failed = 0
+    with open_input(args.input) as source:
+        out = open(args.out, "a", encoding="utf-8") if args.out else sys.stdout
+        try:
+            for result in iter_results(client, read_questions(source), args.workers, done):
+                # One flushed line per result is the checkpoint
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                count += 1
+                failed += result["error"] is not None
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    print(f"Answered {count} questions ({failed} errors)", file=sys.stderr)
+
+
+def batch_request(item, route, model=None):
+    """One OpenAI Batch API request line for a question, with its routed model and token limit"""
+    return {
+        "custom_id": item["id"],
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model or route.model,
+            "messages": app.build_messages(item["question"], item.get("history", [])),
+            "temperature": app.ANALYSIS_TEMPERATURE,
+            "max_tokens": route.max_tokens,
+            "top_p": 0.9,
+        },
+    }
+
+
+def run_openai_batch(args):
+    done = load_checkpoint(args.skip_answered) if args.skip_answered else set()
+    # Catalog lookups need no model call: they are answered now, like analyze() does
+    results_path = args.results or args.skip_answered or os.path.splitext(args.out)[0] + ".catalog.jsonl"
+    count = local = 0
+    with open_input(args.input) as source, open(args.out, "w", encoding="utf-8") as out:
+        for item in read_questions(source):
+            if item["id"] in done:
+                continue
+            route = app.route_question(item["question"])
+            if route.tier == "catalog":
+                with open(results_path, "a", encoding="utf-8") as results:
+                    results.write(json.dumps(analyze(None, item)) + "\n")
+                local += 1
+            else:
+                out.write(json.dumps(batch_request(item, route, args.model)) + "\n")
+                count += 1
+    print(f"Wrote {count} batch requests to {args.out}", file=sys.stderr)
+    if local:
+        print(f"Answered {local} catalog lookups locally into {results_path}", file=sys.stderr)
+    if args.submit and count:
+        client = get_client()
+        with open(args.out, "rb") as f:
+            batch_file = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(input_file_id=batch_file.id, endpoint="/v1/chat/completions",
+                                      completion_window="24h")
+        print(f"Submitted batch {batch.id} ({batch.status})", file=sys.stderr)
+        print(batch.id)
+
+
+def run_openai_batch_results(args):
+    client = get_client()
+    batch = client.batches.retrieve(args.batch_id)
+    if batch.status != "completed":
+        sys.exit(f"Batch {batch.id} is {batch.status}, not completed yet")
+    done = load_checkpoint(args.out)
+    count = 0
+    with open(args.out, "a", encoding="utf-8") as out:
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            record = json.loads(line)
+            if record["custom_id"] in done:
+                continue
+            body = (record.get("response") or {}).get("body") or {}
+            error = record.get("error") or body.get("error")
+            out.write(json.dumps({
+                "id": record["custom_id"],
+                "answer": None if error else body["choices"][0]["message"]["content"],
+                "error": f"{ERROR_PREFIX}: {error}" if error else None,
+                "batch_id": batch.id,
+                "finished_at": time.time(),
+            }) + "\n")
+            count += 1
+    print(f"Wrote {count} results to {args.out}", file=sys.stderr)
+
+
+def create_api(workers=4):
+    """FastAPI app exposing single and streamed batch analysis"""
+    try:
+        from fastapi import FastAPI, HTTPException, Request
+        from fastapi.responses import StreamingResponse
+        from pydantic import BaseModel
+    except ImportError:
+        sys.exit("The HTTP service needs FastAPI: pip install fastapi uvicorn")
+
+    api = FastAPI(title="OptimAIze Business Analysis API")
+    client = get_client()
+    # Bounds concurrent model calls across all HTTP requests
+    slots = threading.BoundedSemaphore(workers)
+
+    class AnalysisRequest(BaseModel):
+        question: str
+        id: str = None
+        history: list = []
+
+    @api.post("/analyze")
+    def analyze_one(request: AnalysisRequest):
+        item = {"id": request.id or question_id(request.question), "question": request.question,
+                "history": request.history}
+        with slots:
+            return analyze(client, item, INTERACTIVE)
+
+    @api.post("/batch")
+    async def analyze_batch(request: Request):
+        """Body is JSONL of questions; results stream back as JSONL as they finish"""
+        try:
+            items = list(read_questions((await request.body()).decode().splitlines()))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        def results():
+            for result in iter_results(client, items, workers, slots=slots):
+                yield json.dumps(result) + "\n"
+
+        return StreamingResponse(results(), media_type="application/x-ndjson")
+
+    @api.get("/healthz")
+    def health():
+        return {"status": "ok", "catalog_version": app.get_catalog().version}
+
+    return api
+
+
+def run_serve(args):
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("The HTTP service needs uvicorn: pip install fastapi uvicorn")
+    uvicorn.run(create_api(args.workers), host=args.host, port=args.port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless OptimAIze business analysis")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="answer a JSONL file or stdin stream of questions")
+    batch.add_argument("input", help="questions JSONL, or - for stdin")
+    batch.add_argument("--out", help="results JSONL, appended to and used as the resume checkpoint")
+    batch.add_argument("--workers", type=int, default=4)
+    batch.set_defaults(run=run_batch)
+
+    openai_batch = commands.add_parser("openai-batch", help="write an OpenAI Batch API input file")
+    openai_batch.add_argument("input", help="questions JSONL, or - for stdin")
+    openai_batch.add_argument("--out", required=True, help="batch requests JSONL to write")
+    openai_batch.add_argument("--model", help="model for every request (default: the routed tier's model)")
+    openai_batch.add_argument("--skip-answered", metavar="RESULTS", help="leave out ids answered in RESULTS")
+    openai_batch.add_argument("--results", help="results JSONL to append catalog lookups to, answered locally "
+                                                "(default: the --skip-answered file, else <out>.catalog.jsonl)")
+    openai_batch.add_argument("--submit", action="store_true", help="upload the file and create the batch")
+    openai_batch.set_defaults(run=run_openai_batch)
+
+    batch_results = commands.add_parser("openai-batch-results", help="collect a finished Batch API job")
+    batch_results.add_argument("batch_id")
+    batch_results.add_argument("--out", required=True, help="results JSONL to append to")
+    batch_results.set_defaults(run=run_openai_batch_results)
+
+    serve = commands.add_parser("serve", help="run the HTTP API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--workers", type=int, default=4, help="concurrent model calls")
+    serve.set_defaults(run=run_serve)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""Local OpenAI-compatible stub for trying the app without spending API credits.
+
+Simulates latency (with jitter and per-token delay), streaming, rate limits
+(random 429s or a requests-per-minute budget), server errors and JSON-schema
+structured output.
+
+Run it and point the app at it:
+
+    python mock_openai_server.py --port 8765 --latency 0.5 --token-delay 0.02
+    OPENAI_API_KEY=mock OPENAI_BASE_URL=http://127.0.0.1:8765/v1 streamlit run app.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY_TOKENS = 60
+
+
+class MockOptions:
+    """Behaviour knobs for the stub server"""
+
+    def __init__(self, latency=0.0, token_delay=0.0, reply_tokens=DEFAULT_REPLY_TOKENS,
+                 rate_limit_rate=0.0, retry_after=0.1, latency_jitter=0.0, error_rate=0.0,
+                 requests_per_minute=0, rpm_window=60.0):
+        self.latency = latency
+        # Extra uniform random latency on top of ``latency``
+        self.latency_jitter = latency_jitter
+        self.token_delay = token_delay
+        self.reply_tokens = reply_tokens
+        # Fraction of completions rejected with 429, and the Retry-After sent with them
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        # Fraction of completions failing with a 500
+        self.error_rate = error_rate
+        # Sliding one-minute request limit, like an account RPM limit (0 = unlimited)
+        self.requests_per_minute = requests_per_minute
+        # Seconds the RPM limit is enforced over, pro rata (the real API also limits short bursts)
+        self.rpm_window = rpm_window
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+    def admit(self):
+        """Count a completion request; 0 if it fits the RPM limit, else seconds until a slot frees"""
+        with self._lock:
+            self.counters["requests"] += 1
+            if not self.requests_per_minute:
+                return 0.0
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > self.rpm_window:
+                self._recent.popleft()
+            if len(self._recent) >= max(1, round(self.requests_per_minute * self.rpm_window / 60)):
+                return max(0.01, self.rpm_window - (now - self._recent[0]))
+            self._recent.append(now)
+            return 0.0
+
+    def count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+
+def _last_user_message(messages):
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return str(message.get("content", ""))
+    return ""
+
+
+def _reply_tokens(body, options):
+    """Build the fake completion as a list of word tokens"""
+    question = _last_user_message(body.get("messages", []))
+    limit = min(body.get("max_tokens") or options.reply_tokens, options.reply_tokens)
+    words = f"Mock business analysis for: {question}".split()
+    filler = ["ROI", "growth", "market", "impact", "revenue", "value"]
+    while len(words) < limit:
+        words.append(filler[len(words) % len(filler)])
+    return [word if idx == 0 else f" {word}" for idx, word in enumerate(words[:limit])]
+
+
+def _schema_example(schema, rng, key="value", index=0):
+    """A value matching a JSON schema, with the index-th enum value where there is a choice"""
+    if "enum" in schema:
+        return schema["enum"][index % len(schema["enum"])]
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: _schema_example(sub, rng, name, index) for name, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        items = schema.get("items", {})
+        # One item per choice of an enum property (e.g. one entry per product)
+        count = max([len(sub["enum"]) for sub in items.get("properties", {}).values() if "enum" in sub] or [1])
+        return [_schema_example(items, rng, key, i) for i in range(count)]
+    if kind == "integer":
+        return index + 1
+    if kind == "number":
+        low, high = schema.get("minimum", 0), schema.get("maximum", 100)
+        return round(rng.uniform(low, high), 1)
+    if kind == "boolean":
+        return True
+    return f"Mock {key}"
+
+
+def _structured_reply_tokens(body):
+    """A JSON reply for response_format json_schema, split into streaming-sized chunks"""
+    schema = body["response_format"]["json_schema"]["schema"]
+    rng = random.Random(_last_user_message(body.get("messages", [])))
+    content = json.dumps(_schema_example(schema, rng))
+    return [content[i:i + 16] for i in range(0, len(content), 16)]
+
+
+def _count_prompt_tokens(body):
+    return sum(len(str(m.get("content", ""))) // 4 + 1 for m in body.get("messages", []))
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """Handles the subset of the OpenAI REST API that app.py uses"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def options(self):
+        return self.server.options
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {
+                "object": "list",
+                "data": [{"id": model, "object": "model", "created": 0, "owned_by": "mock"}
+                         for model in ("gpt-4o", "gpt-4o-mini", "gpt-3.5-turbo")],
+            })
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+
+        wait = self.options.admit()
+        if wait or random.random() < self.options.rate_limit_rate:
+            self.options.count("rate_limited")
+            self._send_json(429, {
+                "error": {"message": "Rate limit reached (mock)", "type": "requests", "code": "rate_limit_exceeded"},
+            }, headers={"Retry-After": f"{wait or self.options.retry_after:.2f}"})
+            return
+        if random.random() < self.options.error_rate:
+            self.options.count("errors")
+            self._send_json(500, {"error": {"message": "Internal server error (mock)", "type": "server_error"}})
+            return
+
+        time.sleep(self.options.latency + random.uniform(0, self.options.latency_jitter))
+        if (body.get("response_format") or {}).get("type") == "json_schema":
+            tokens = _structured_reply_tokens(body)
+        else:
+            tokens = _reply_tokens(body, self.options)
+        if body.get("stream"):
+            self._stream_completion(body, tokens)
+        else:
+            time.sleep(self.options.token_delay * len(tokens))
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-4o"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": _count_prompt_tokens(body),
+                    "completion_tokens": len(tokens),
+                    "total_tokens": _count_prompt_tokens(body) + len(tokens),
+                },
+            })
+
+    def _stream_completion(self, body, tokens):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        def chunk(delta, finish_reason=None):
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-4o"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        try:
+            self._write_event(chunk({"role": "assistant", "content": ""}))
+            for token in tokens:
+                time.sleep(self.options.token_delay)
+                self._write_event(chunk({"content": token}))
+            self._write_event(chunk({}, "stop"))
+            if (body.get("stream_options") or {}).get("include_usage"):
+                self._write_event({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "gpt-4o"),
+                    "choices": [],
+                    "usage": {
+                        "prompt_tokens": _count_prompt_tokens(body),
+                        "completion_tokens": len(tokens),
+                        "total_tokens": _count_prompt_tokens(body) + len(tokens),
+                    },
+                })
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the stream
+            pass
+
+    def _write_event(self, payload):
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+        self.wfile.flush()
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    """Threaded HTTP server carrying the mock options"""
+
+    daemon_threads = True
+    # Load tests open many connections at once; the default backlog of 5 drops them
+    request_queue_size = 256
+
+    def __init__(self, address, options):
+        super().__init__(address, MockOpenAIHandler)
+        self.options = options
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_mock_server(host="127.0.0.1", port=0, **options):
+    """Start the stub on a background thread and return the server (see .base_url)"""
+    server = MockOpenAIServer((host, port), MockOptions(**options))
+    threading.Thread(target=server.serve_forever, name="mock-openai", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first byte")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between tokens")
+    parser.add_argument("--reply-tokens", type=int, default=DEFAULT_REPLY_TOKENS)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="extra random seconds of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 500")
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before 429s (0 = unlimited)")
+    parser.add_argument("--rpm-window", type=float, default=60.0, help="seconds the RPM limit is enforced over")
+    args = parser.parse_args()
+
+    server = MockOpenAIServer((args.host, args.port), MockOptions(
+        latency=args.latency, token_delay=args.token_delay, reply_tokens=args.reply_tokens,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+        latency_jitter=args.latency_jitter, error_rate=args.error_rate, requests_per_minute=args.rpm,
+        rpm_window=args.rpm_window,
+    ))
+    print(f"Mock OpenAI server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
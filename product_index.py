@@ -0,0 +1,178 @@
+"""Precomputed, per-catalog-version view of the products for the dashboards.
+
+The comma-separated catalog fields are split and every impact percentage is
+parsed once per catalog version, instead of on every Streamlit rerun.
+"""
+
+import re
+import threading
+
+# "40%" or a range like "40-60%"
+_PERCENT = re.compile(r"(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?\s*%")
+_IMPACT_PHRASE = re.compile(r"^(?P<verb>\w+)\s+(?P<metric>.+?)\s+by\s+", re.IGNORECASE)
+
+# Ranking categories for impact figures: (verbs, metric keywords) rules, any of which may match
+_REDUCES = ("reduces", "cuts", "lowers", "prevents")
+_IMPROVES = ("improves", "increases", "boosts", "raises")
+IMPACT_CATEGORIES = {
+    "Cost reduction": [(_REDUCES, ("cost",))],
+    "Time savings": [(_REDUCES, ("time", "downtime")), (_IMPROVES, ("speed",))],
+    "Error reduction": [(_REDUCES, ("error",))],
+    "Quality & accuracy": [(_IMPROVES, ("accuracy", "consistency", "satisfaction", "fix rate"))],
+}
+
+
+def split_list(text, separator=","):
+    """Split a comma-separated catalog field into trimmed items"""
+    return [item.strip() for item in text.split(separator) if item.strip()]
+
+
+class ImpactFigure:
+    """One parsed business impact claim, e.g. 'Reduces support costs by 40-60%'"""
+
+    __slots__ = ("text", "verb", "metric", "low", "high")
+
+    def __init__(self, text, verb, metric, low, high):
+        self.text = text
+        self.verb = verb
+        self.metric = metric
+        self.low = low
+        self.high = high
+
+    @classmethod
+    def parse_all(cls, impact_text):
+        """Every percentage figure in a business_impact field"""
+        figures = []
+        for clause in split_list(impact_text):
+            match = _PERCENT.search(clause)
+            if not match:
+                continue
+            low = float(match.group(1))
+            high = float(match.group(2)) if match.group(2) else low
+            phrase = _IMPACT_PHRASE.match(clause)
+            verb = phrase.group("verb").lower() if phrase else ""
+            metric = phrase.group("metric").lower() if phrase else clause.lower()
+            figures.append(cls(clause, verb, metric, low, high))
+        return figures
+
+    @property
+    def label(self):
+        low = f"{self.low:g}"
+        return f"{low}%" if self.low == self.high else f"{low}-{self.high:g}%"
+
+    def matches(self, category):
+        return any(self.verb in verbs and any(keyword in self.metric for keyword in keywords)
+                   for verbs, keywords in IMPACT_CATEGORIES[category])
+
+
+class ProductRecord:
+    """A product with its fields pre-split and impact figures pre-parsed"""
+
+    __slots__ = ("name", "description", "features", "kpis", "target_market", "target_markets",
+                 "revenue_model", "revenue_models", "business_impact", "impacts",
+                 "competitive_advantage", "growth_metrics", "challenges", "best_impacts")
+
+    def __init__(self, product):
+        context = product["business_context"]
+        self.name = product["name"]
+        self.description = product["description"]
+        self.features = tuple(product["features"])
+        self.kpis = tuple(context["kpis"])
+        self.target_market = context["target_market"]
+        self.target_markets = tuple(split_list(self.target_market))
+        self.revenue_model = context["revenue_model"]
+        self.revenue_models = tuple(split_list(self.revenue_model))
+        self.business_impact = context["business_impact"]
+        self.impacts = tuple(ImpactFigure.parse_all(self.business_impact))
+        self.competitive_advantage = context["competitive_advantage"]
+        self.growth_metrics = context["growth_metrics"]
+        self.challenges = context["challenges"]
+        self.best_impacts = {
+            category: max((figure for figure in self.impacts if figure.matches(category)),
+                          key=lambda figure: figure.high, default=None)
+            for category in IMPACT_CATEGORIES
+        }
+
+    @property
+    def primary_impact(self):
+        """The first impact clause, as shown in the comparison table"""
+        return split_list(self.business_impact)[0] if self.business_impact else ""
+
+    def best_impact(self, category):
+        """Largest impact figure in a category, or None"""
+        return self.best_impacts[category]
+
+
+# Sort keys for ProductTable.sorted_by(), besides the impact categories
+COUNT_SORT_KEYS = {
+    "Target markets": lambda record: len(record.target_markets),
+    "Revenue streams": lambda record: len(record.revenue_models),
+    "KPIs tracked": lambda record: len(record.kpis),
+}
+
+
+class ProductTable:
+    """All product records of one catalog version, with sorting and filtering"""
+
+    def __init__(self, catalog_version, products):
+        self.version = catalog_version
+        self.records = tuple(ProductRecord(product) for product in products)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def filter(self, predicate):
+        """Records matching a predicate, in catalog order"""
+        return [record for record in self.records if predicate(record)]
+
+    def in_market(self, keyword):
+        """Records whose target markets mention a keyword"""
+        keyword = keyword.lower()
+        return self.filter(lambda record: any(keyword in market.lower() for market in record.target_markets))
+
+    def rank_by_impact(self, category):
+        """Records by their best figure in an impact category, highest first; others last"""
+        return sorted(self.records, key=lambda record: -(record.best_impact(category) or _NO_IMPACT).high)
+
+    def sorted_by(self, key):
+        """Records ordered by an impact category or count key, highest first"""
+        if key in IMPACT_CATEGORIES:
+            return self.rank_by_impact(key)
+        if key in COUNT_SORT_KEYS:
+            return sorted(self.records, key=COUNT_SORT_KEYS[key], reverse=True)
+        return list(self.records)
+
+    def columns(self):
+        """Column-oriented copy of the table, e.g. for pandas.DataFrame(table.columns())"""
+        return {
+            "Product": [record.name for record in self.records],
+            "Target Markets": [len(record.target_markets) for record in self.records],
+            "Revenue Streams": [len(record.revenue_models) for record in self.records],
+            "KPIs": [len(record.kpis) for record in self.records],
+            **{
+                category: [getattr(record.best_impact(category), "high", None) for record in self.records]
+                for category in IMPACT_CATEGORIES
+            },
+        }
+
+
+_NO_IMPACT = ImpactFigure("", "", "", float("-inf"), float("-inf"))
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_product_table(catalog):
+    """Table for a products.Catalog, built once per catalog version"""
+    table = _tables.get(catalog.version)
+    if table is None:
+        with _tables_lock:
+            table = _tables.get(catalog.version)
+            if table is None:
+                table = ProductTable(catalog.version, catalog.products)
+                _tables.clear()
+                _tables[catalog.version] = table
+    return table
@@ -0,0 +1,236 @@
+"""OptimAIze product catalog.
+
+The catalog is read from a JSON, YAML or CSV file, or a SQLite table
+(PRODUCT_CATALOG_PATH, default data/products.json), validated, and cached.
+Streamlit reruns only pay for a stat() call: the file is re-read when its
+mtime or size changes, and re-parsed only when its bytes actually differ.
+The catalog version is a hash of the parsed data, so caches keyed on it
+survive edits that do not change the data (formatting, re-saving the file).
+"""
+
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "products.json")
+
+# Required business_context fields; every one is a comma-separated string except kpis
+CONTEXT_TEXT_FIELDS = ("target_market", "revenue_model", "competitive_advantage",
+                       "growth_metrics", "business_impact", "challenges")
+CONTEXT_LIST_FIELDS = ("kpis",)
+LIST_FIELDS = ("features",) + CONTEXT_LIST_FIELDS
+
+# Separator for list fields in flat formats (CSV columns, SQLite rows)
+FLAT_LIST_SEPARATOR = ";"
+
+
+class CatalogError(ValueError):
+    """The catalog file is missing, unreadable or does not match the schema"""
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """A parsed, validated catalog and its content version"""
+
+    data: dict
+    version: str
+    path: str
+
+    @property
+    def products(self):
+        return self.data["products"]
+
+
+def compute_catalog_hash(catalog):
+    """Stable content hash of a catalog, independent of key order"""
+    canonical = json.dumps(catalog, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def validate_catalog(data):
+    """Check a parsed catalog against the product schema, raising CatalogError"""
+    if not isinstance(data, dict) or not isinstance(data.get("products"), list) or not data["products"]:
+        raise CatalogError("Catalog must be an object with a non-empty 'products' list")
+    names = set()
+    for idx, product in enumerate(data["products"]):
+        where = f"products[{idx}]"
+        if not isinstance(product, dict):
+            raise CatalogError(f"{where} must be an object")
+        for field in ("name", "description"):
+            if not isinstance(product.get(field), str) or not product[field].strip():
+                raise CatalogError(f"{where}.{field} must be a non-empty string")
+        if product["name"] in names:
+            raise CatalogError(f"{where}.name {product['name']!r} is duplicated")
+        names.add(product["name"])
+        where = f"{where} ({product['name']})"
+        if not _is_string_list(product.get("features")):
+            raise CatalogError(f"{where}.features must be a list of strings")
+        context = product.get("business_context")
+        if not isinstance(context, dict):
+            raise CatalogError(f"{where}.business_context must be an object")
+        for field in CONTEXT_TEXT_FIELDS:
+            if not isinstance(context.get(field), str) or not context[field].strip():
+                raise CatalogError(f"{where}.business_context.{field} must be a non-empty string")
+        for field in CONTEXT_LIST_FIELDS:
+            if not _is_string_list(context.get(field)):
+                raise CatalogError(f"{where}.business_context.{field} must be a list of strings")
+    return data
+
+
+def _is_string_list(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _product_from_row(row):
+    """Build a nested product from a flat CSV/SQLite row"""
+    product = {"business_context": {}}
+    for column, value in row.items():
+        if column is None or value is None or str(value).strip() == "":
+            continue
+        value = str(value).strip()
+        if column in LIST_FIELDS:
+            value = [item.strip() for item in value.split(FLAT_LIST_SEPARATOR) if item.strip()]
+        if column in CONTEXT_TEXT_FIELDS or column in CONTEXT_LIST_FIELDS:
+            product["business_context"][column] = value
+        else:
+            product[column] = value
+    # Keep the usual key order: name, description, business_context, features, extras
+    ordered = {key: product.pop(key) for key in ("name", "description", "business_context", "features")
+               if key in product}
+    ordered.update(product)
+    return ordered
+
+
+def _parse_json(raw, path):
+    return json.loads(raw.decode("utf-8-sig"))
+
+
+def _parse_yaml(raw, path):
+    try:
+        import yaml
+    except ImportError:
+        raise CatalogError("PyYAML is required to load YAML catalogs (pip install pyyaml)")
+    return yaml.safe_load(raw.decode("utf-8-sig"))
+
+
+def _parse_csv(raw, path):
+    reader = csv.DictReader(io.StringIO(raw.decode("utf-8-sig")))
+    return {"products": [_product_from_row(row) for row in reader]}
+
+
+def _parse_sqlite(raw, path):
+    table = os.getenv("PRODUCT_CATALOG_TABLE", "products")
+    if not table.isidentifier():
+        raise CatalogError(f"Invalid PRODUCT_CATALOG_TABLE {table!r}")
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(f"SELECT * FROM {table}").fetchall()
+    finally:
+        conn.close()
+    return {"products": [_product_from_row(dict(row)) for row in rows]}
+
+
+PARSERS = {
+    ".json": _parse_json,
+    ".yaml": _parse_yaml,
+    ".yml": _parse_yaml,
+    ".csv": _parse_csv,
+    ".sqlite": _parse_sqlite,
+    ".sqlite3": _parse_sqlite,
+    ".db": _parse_sqlite,
+}
+
+
+def parse_catalog(raw, path):
+    """Parse and validate catalog file contents based on the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    parser = PARSERS.get(extension)
+    if parser is None:
+        raise CatalogError(f"Unsupported catalog format {extension!r} (expected one of {sorted(PARSERS)})")
+    try:
+        data = parser(raw, path)
+    except CatalogError:
+        raise
+    except Exception as e:
+        raise CatalogError(f"Could not parse {path}: {e}") from e
+    return validate_catalog(data)
+
+
+class CatalogLoader:
+    """Loads one catalog file and re-parses it only when its contents change"""
+
+    def __init__(self, path):
+        self.path = path
+        self.error = None
+        self._lock = threading.Lock()
+        self._stat = None
+        self._raw_hash = None
+        self._catalog = None
+
+    def get(self):
+        """Return the current catalog
+
+        If the file becomes invalid after a good load, the last good catalog
+        is kept and the problem is reported in ``error``.
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            if self._catalog is None:
+                raise CatalogError(f"Catalog file not found: {self.path}") from e
+            self.error = f"Catalog file unavailable, serving the last loaded version: {e}"
+            return self._catalog
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key == self._stat:
+            return self._catalog
+
+        with self._lock:
+            if key == self._stat:
+                return self._catalog
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            raw_hash = hashlib.sha256(raw).hexdigest()
+            if raw_hash != self._raw_hash:
+                try:
+                    data = parse_catalog(raw, self.path)
+                except CatalogError as e:
+                    if self._catalog is None:
+                        raise
+                    logger.warning("Keeping the previous catalog: %s", e)
+                    self.error = str(e)
+                    self._stat = key
+                    return self._catalog
+                version = compute_catalog_hash(data)
+                if self._catalog is None or version != self._catalog.version:
+                    self._catalog = Catalog(data=data, version=version, path=self.path)
+                self._raw_hash = raw_hash
+            self.error = None
+            self._stat = key
+            return self._catalog
+
+
+_loaders = {}
+_loaders_lock = threading.Lock()
+
+
+def get_catalog_loader(path=None):
+    """Process-wide loader for a catalog path (default: PRODUCT_CATALOG_PATH)"""
+    path = os.path.abspath(path or os.getenv("PRODUCT_CATALOG_PATH") or DEFAULT_CATALOG_PATH)
+    with _loaders_lock:
+        if path not in _loaders:
+            _loaders[path] = CatalogLoader(path)
+        return _loaders[path]
+
+
+def get_catalog(path=None):
+    """Current catalog for a path (default: PRODUCT_CATALOG_PATH)"""
+    return get_catalog_loader(path).get()
@@ -0,0 +1,200 @@
+"""System prompt construction for the business analysis chatbot.
+
+Prompts are built once per (catalog version, encoding) and reused for every
+chat turn instead of re-serializing the catalog each time.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+SYSTEM_PROMPT_TEMPLATE = """You are a Business Analysis Assistant for OptimAIze products. Your role is to provide:
+1. Non-technical business insights about our products
+2. Comparative analysis between products
+3. Target market recommendations
+4. Revenue model explanations
+5. Business impact analysis
+6. KPI explanations and tracking suggestions
+7. Competitive advantage positioning
+8. Growth strategy recommendations
+
+Rules:
+- ALWAYS provide non-technical, business-focused explanations
+- Use simple, clear language understandable by business executives
+- Focus on ROI, business value, and strategic positioning
+- When comparing products, highlight which is best for specific business needs
+- Provide actionable business recommendations
+- Never use technical jargon without business context
+- If asked about technical details, redirect to business implications
+
+Available Products Data:
+{products_data}
+
+Example Questions You Can Answer:
+1. "Which product is best for reducing operational costs?"
+2. "Compare all revenue models"
+3. "Which product is best for healthcare industry?"
+4. "What are the main business challenges?"
+5. "How do KPIs differ across products?"
+6. "Which product reduces costs the most?"
+7. "Compare target markets for all products"
+8. "What's the growth potential for each product?"
+
+Remember: You are talking to business professionals, not engineers. Focus on business outcomes, financial impact, and strategic value."""
+
+# "indented" is the original json.dumps(indent=2); the others carry the same data in fewer tokens
+PROMPT_ENCODINGS = ("indented", "minified", "markdown", "table")
+
+# Rough stand-in for a BPE tokenizer when tiktoken is not installed: a newline with its
+# indentation, or a word/symbol with its leading space, each count as one token
+_APPROX_TOKEN_PATTERN = re.compile(r"\n[ \t]*|\s?\w+|\s?[^\w\s]|\s")
+
+_encoder = None
+_encoder_loaded = False
+
+
+def _get_encoder(model="gpt-4o"):
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        try:
+            import tiktoken
+            _encoder = tiktoken.encoding_for_model(model)
+        except Exception:
+            _encoder = None
+        _encoder_loaded = True
+    return _encoder
+
+
+def count_tokens(text):
+    """Count prompt tokens with tiktoken, or approximate them if it is unavailable"""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return len(_APPROX_TOKEN_PATTERN.findall(text))
+
+
+def _format_value(value):
+    if isinstance(value, list):
+        return "; ".join(str(item) for item in value)
+    return str(value)
+
+
+def _flatten_product(product):
+    """Flatten a product into ordered (label, text) pairs"""
+    fields = []
+    for key, value in product.items():
+        if key == "name":
+            continue
+        if isinstance(value, dict):
+            fields.extend((sub_key, _format_value(sub_value)) for sub_key, sub_value in value.items())
+        else:
+            fields.append((key, _format_value(value)))
+    return fields
+
+
+def _label(key):
+    return key.replace("_", " ").capitalize()
+
+
+def render_products(catalog, encoding="indented"):
+    """Render the catalog for the prompt in the given encoding"""
+    if encoding == "indented":
+        return json.dumps(catalog, indent=2)
+    if encoding == "minified":
+        return json.dumps(catalog, separators=(",", ":"), ensure_ascii=False)
+    if encoding == "markdown":
+        sections = []
+        for product in catalog["products"]:
+            lines = [f"### {product['name']}"]
+            lines.extend(f"- {_label(key)}: {text}" for key, text in _flatten_product(product))
+            sections.append("\n".join(lines))
+        return "\n\n".join(sections)
+    if encoding == "table":
+        columns = []
+        rows = []
+        for product in catalog["products"]:
+            fields = dict(_flatten_product(product))
+            columns.extend(key for key in fields if key not in columns)
+            rows.append((product["name"], fields))
+        header = "| Name | " + " | ".join(_label(key) for key in columns) + " |"
+        divider = "|" + "---|" * (len(columns) + 1)
+        body = [
+            "| " + " | ".join([name] + [fields.get(key, "").replace("|", "/") for key in columns]) + " |"
+            for name, fields in rows
+        ]
+        return "\n".join([header, divider] + body)
+    raise ValueError(f"Unknown prompt encoding: {encoding!r} (expected one of {PROMPT_ENCODINGS})")
+
+
+def render_catalog_summary(catalog):
+    """One line per product, for prompts that carry only a few products in full"""
+    return "\n".join(f"- {product['name']}: {product.get('description', '')}" for product in catalog["products"])
+
+
+def render_selected_products(catalog, product_names, encoding="indented"):
+    """Catalog summary plus full details of the selected products"""
+    selected = [product for product in catalog["products"] if product["name"] in product_names]
+    return (
+        "Catalog summary (all products):\n"
+        f"{render_catalog_summary(catalog)}\n\n"
+        "Full details of the products most relevant to this question:\n"
+        f"{render_products({'products': selected}, encoding)}"
+    )
+
+
+@dataclass(frozen=True)
+class SystemPrompt:
+    """An immutable, fully rendered system prompt"""
+
+    text: str
+    encoding: str
+    catalog_version: str
+    content_hash: str
+    token_count: int
+    # Products included in full; empty means the whole catalog
+    product_names: tuple = ()
+
+
+def build_system_prompt(catalog, catalog_version, encoding="indented", product_names=()):
+    """Render the system prompt for a catalog, or for a subset of its products (uncached)"""
+    if product_names:
+        products_data = render_selected_products(catalog, product_names, encoding)
+    else:
+        products_data = render_products(catalog, encoding)
+    text = SYSTEM_PROMPT_TEMPLATE.format(products_data=products_data)
+    return SystemPrompt(
+        text=text,
+        encoding=encoding,
+        catalog_version=catalog_version,
+        content_hash=hashlib.sha256(text.encode()).hexdigest()[:16],
+        token_count=count_tokens(text),
+        product_names=tuple(product_names),
+    )
+
+
+# One entry per (catalog version, encoding, product subset); subsets make this unbounded otherwise
+PROMPT_CACHE_SIZE = 256
+
+_prompt_cache = OrderedDict()
+_prompt_cache_lock = threading.Lock()
+
+
+def get_cached_system_prompt(catalog, catalog_version, encoding="indented", product_names=()):
+    """Return the prompt for this catalog version, building it on first use"""
+    key = (catalog_version, encoding, tuple(product_names))
+    with _prompt_cache_lock:
+        prompt = _prompt_cache.get(key)
+        if prompt is not None:
+            _prompt_cache.move_to_end(key)
+            return prompt
+        prompt = build_system_prompt(catalog, catalog_version, encoding, product_names)
+        # Prompts for older catalog versions are never requested again
+        for stale in [k for k in _prompt_cache if k[0] != catalog_version]:
+            del _prompt_cache[stale]
+        _prompt_cache[key] = prompt
+        if len(_prompt_cache) > PROMPT_CACHE_SIZE:
+            _prompt_cache.popitem(last=False)
+    return prompt
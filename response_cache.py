@@ -0,0 +1,209 @@
+"""Persistent cache of business analysis answers.
+
+Answers are keyed on (system prompt, normalized question, model, temperature,
+conversation), stored in SQLite so they survive restarts, evicted by TTL and least-recent use,
+and dropped as soon as the product catalog version changes. An optional local
+embedding lookup serves near-duplicate questions.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+EMBEDDING_DIM = 512
+
+_PUNCTUATION = re.compile(r"[^\w\s%]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    question = _PUNCTUATION.sub(" ", question.lower())
+    return _WHITESPACE.sub(" ", question).strip()
+
+
+def make_cache_key(prompt_hash, question, model, temperature, conversation=""):
+    """Hash the (system prompt, normalized question, model, temperature, conversation) tuple"""
+    raw = "\x1f".join([prompt_hash, normalize_question(question), model, f"{temperature:.3f}", conversation])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def conversation_hash(messages):
+    """Hash of the earlier turns sent with a question ("" when there are none)
+
+    Follow-ups like "Why?" only have an answer within their conversation, so
+    they must not share cache entries across conversations; standalone
+    questions are cached without one. Leading assistant messages (greetings)
+    are the same everywhere and ignored.
+    """
+    messages = list(messages)
+    start = 0
+    while start < len(messages) and messages[start]["role"] == "assistant":
+        start += 1
+    turns = [(m["role"], m["content"]) for m in messages[start:]]
+    if not turns:
+        return ""
+    return hashlib.sha256(json.dumps(turns).encode()).hexdigest()
+
+
+def embed_question(question):
+    """Cheap local embedding: hashed word and character-trigram counts, L2-normalized"""
+    # numpy is imported on first use, keeping it out of the app's start-up
+    import numpy as np
+
+    text = normalize_question(question)
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    features = text.split()
+    padded = f" {text} "
+    features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode(), digest_size=4).digest()
+        vector[int.from_bytes(digest, "little") % EMBEDDING_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass
+class CachedResponse:
+    """A cache hit"""
+
+    response: str
+    latency_ms: float
+    similarity: float = 1.0
+
+
+class ResponseCache:
+    """SQLite-backed answer cache with TTL/LRU eviction and hit statistics"""
+
+    def __init__(self, path, max_entries=1000, ttl_seconds=7 * 24 * 3600, similarity_threshold=0.0):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                context TEXT NOT NULL,
+                catalog_version TEXT NOT NULL,
+                question TEXT NOT NULL,
+                response TEXT NOT NULL,
+                latency_ms REAL NOT NULL,
+                embedding BLOB,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_context ON responses (context)")
+        self._conn.commit()
+        self._catalog_version = None
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    @staticmethod
+    def _context(prompt_hash, model, temperature, conversation=""):
+        return f"{prompt_hash}:{model}:{temperature:.3f}:{conversation}"
+
+    def sync_catalog(self, catalog_version):
+        """Drop every entry built from a different catalog version"""
+        if catalog_version == self._catalog_version:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE catalog_version != ?", (catalog_version,))
+            self._conn.commit()
+            self._catalog_version = catalog_version
+
+    def get(self, prompt, question, model, temperature, conversation=""):
+        """Look up an answer for a SystemPrompt and question, or return None
+
+        ``conversation`` is the conversation_hash() of the turns sent along with it.
+        """
+        self.sync_catalog(prompt.catalog_version)
+        key = make_cache_key(prompt.content_hash, question, model, temperature, conversation)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, response, latency_ms, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            similarity = 1.0
+            if row is None and self.similarity_threshold > 0:
+                row, similarity = self._nearest(
+                    self._context(prompt.content_hash, model, temperature, conversation), question, now)
+            if row is not None and now - row[3] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, row[0]))
+            self._conn.commit()
+            self.hits += 1
+            if similarity < 1.0:
+                self.semantic_hits += 1
+            self.saved_ms += row[2]
+            return CachedResponse(response=row[1], latency_ms=row[2], similarity=similarity)
+
+    def _nearest(self, context, question, now):
+        rows = self._conn.execute(
+            "SELECT key, response, latency_ms, created_at, embedding FROM responses "
+            "WHERE context = ? AND created_at > ?", (context, now - self.ttl_seconds)
+        ).fetchall()
+        if not rows:
+            return None, 0.0
+        import numpy as np
+
+        matrix = np.frombuffer(b"".join(row[4] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+        scores = matrix @ embed_question(question)
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None, 0.0
+        return rows[best][:4], float(scores[best])
+
+    def put(self, prompt, question, model, temperature, response, latency_ms, conversation=""):
+        """Store an answer, evicting expired and least recently used entries"""
+        self.sync_catalog(prompt.catalog_version)
+        key = make_cache_key(prompt.content_hash, question, model, temperature, conversation)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, self._context(prompt.content_hash, model, temperature, conversation), prompt.catalog_version,
+                 question, response, latency_ms, embed_question(question).tobytes(), now, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every cached answer"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        """Hit/miss counters and saved latency since this process started"""
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "saved_ms": self.saved_ms,
+            "entries": len(self),
+        }
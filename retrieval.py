@@ -0,0 +1,138 @@
+"""Offline BM25 retrieval over the product catalog.
+
+Each product is indexed on its name, description, features and business
+context, so a question can be answered from the few relevant products plus a
+compact catalog summary instead of the full catalog.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be best by can do does for from has have how i in is it its me
+of on or our product products should that the their this to us we what when which
+who why will with would you your optimaize tell about
+business company companies industry industries solution solutions help helps use using work works
+""".split())
+
+# Questions that need the whole portfolio rather than a few products
+CATALOG_WIDE = re.compile(
+    r"\b(all|each|every|compare|comparison|across|portfolio|overall|most|least|highest|lowest|rank\w*)\b",
+    re.IGNORECASE,
+)
+
+# Words that refer back to earlier turns ("Why?", "Tell me more", "What about pricing?")
+FOLLOW_UP = re.compile(
+    r"^\s*(and|but|so|also|then)\b|\b(why|it|its|that|this|these|those|they|them|their|one|ones|more|else|"
+    r"what about|how about|instead|above|previous|earlier|same)\b",
+    re.IGNORECASE,
+)
+
+# Questions this short that name no product and are not portfolio-wide lean on the conversation too
+FOLLOW_UP_MAX_WORDS = 5
+
+# Product names count this many times, so naming a product reliably retrieves it
+NAME_WEIGHT = 3
+
+
+def is_catalog_wide(query):
+    """Whether a question is about the whole portfolio rather than specific products"""
+    return bool(CATALOG_WIDE.search(query))
+
+
+def is_follow_up(query, names_product=False):
+    """Whether a question only makes sense together with the earlier turns of its conversation"""
+    if FOLLOW_UP.search(query):
+        return True
+    return not names_product and not is_catalog_wide(query) and len(query.split()) <= FOLLOW_UP_MAX_WORDS
+
+
+def _stem(token):
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 5 and token.endswith("ing"):
+        return token[:-3]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords, lightly stemmed"""
+    return [_stem(token) for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def product_document(product):
+    """Searchable text for one product"""
+    context = product.get("business_context", {})
+    parts = [product["name"]] * NAME_WEIGHT
+    parts.append(product.get("description", ""))
+    parts.extend(product.get("features", []))
+    for value in context.values():
+        parts.extend(value if isinstance(value, list) else [value])
+    return " ".join(str(part) for part in parts)
+
+
+class CatalogIndex:
+    """BM25 index with one document per product"""
+
+    def __init__(self, catalog, k1=1.5, b=0.75):
+        self.products = catalog["products"]
+        self.k1 = k1
+        self.b = b
+        self._docs = [Counter(tokenize(product_document(product))) for product in self.products]
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg_length = sum(self._lengths) / max(len(self._docs), 1)
+        frequencies = Counter(term for doc in self._docs for term in doc)
+        n = len(self._docs)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in frequencies.items()}
+
+    def scores(self, query):
+        """BM25 score of every product for a query"""
+        terms = tokenize(query)
+        results = []
+        for doc, length in zip(self._docs, self._lengths):
+            score = 0.0
+            for term in terms:
+                tf = doc.get(term)
+                if tf:
+                    norm = self.k1 * (1 - self.b + self.b * length / self._avg_length)
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+    def search(self, query, k=3):
+        """Top-k (product, score) pairs with a positive score, best first"""
+        ranked = sorted(zip(self.products, self.scores(query)), key=lambda pair: pair[1], reverse=True)
+        return [(product, score) for product, score in ranked[:k] if score > 0]
+
+    def select_products(self, query, k=3, min_score=1.0, relative_cutoff=0.35):
+        """Products to put in the prompt for a query, or None when it needs the whole catalog"""
+        if is_catalog_wide(query):
+            return None
+        hits = self.search(query, k)
+        if not hits or hits[0][1] < min_score:
+            return None
+        top = hits[0][1]
+        return [product for product, score in hits if score >= top * relative_cutoff]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_catalog_index(catalog, catalog_version):
+    """Index for a catalog version, built once per process"""
+    index = _indexes.get(catalog_version)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(catalog_version)
+            if index is None:
+                index = CatalogIndex(catalog)
+                _indexes.clear()
+                _indexes[catalog_version] = index
+    return index
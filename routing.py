@@ -0,0 +1,253 @@
+"""Route each question to the cheapest tier that can answer it.
+
+A local rule/keyword classifier matches the question against product names
+and catalog fields:
+
+- catalog: a question phrased as a plain lookup of one field of one product
+  ("What are the KPIs of OptimAIze Grader?") is answered straight from the
+  catalog, with no API call. Any word beyond the product, the field and
+  lookup filler ("what", "are", "the", "of", ...) rules this tier out.
+- small: other questions about a single product go to a small, fast model.
+- full: comparisons, recommendations and anything portfolio-wide go to the
+  full analysis model.
+
+Rules and per-tier models and token limits come from DEFAULT_ROUTING_CONFIG,
+overridden by ROUTING_CONFIG (a JSON file path or inline JSON). Decisions are
+logged to the "routing" logger.
+"""
+
+import copy
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from product_index import split_list
+
+logger = logging.getLogger("routing")
+
+TIERS = ("catalog", "small", "full")
+
+DEFAULT_ROUTING_CONFIG = {
+    "enabled": True,
+    # model None means the app's ANALYSIS_MODEL
+    "tiers": {
+        "small": {"model": "gpt-4o-mini", "max_tokens": 400},
+        "full": {"model": None, "max_tokens": 1000},
+    },
+    # Catalog field -> phrases that ask for it
+    "field_keywords": {
+        "kpis": ["kpi", "kpis", "key performance indicator", "metrics tracked"],
+        "features": ["features", "feature list", "capabilities"],
+        "target_market": ["target market", "target markets", "target customers"],
+        "revenue_model": ["revenue model", "revenue models", "pricing model", "pricing models"],
+        "business_impact": ["business impact"],
+        "competitive_advantage": ["competitive advantage", "differentiator", "differentiators", "usp"],
+        "growth_metrics": ["growth metrics"],
+        "challenges": ["challenges", "risks", "limitations"],
+        "description": ["what is", "describe", "description"],
+    },
+    # The only other words a catalog lookup may contain
+    "lookup_words": [
+        "what", "what's", "whats", "which", "are", "is", "the", "a", "an", "of", "for", "its", "it", "s",
+        "list", "show", "me", "tell", "give", "main", "key", "please", "product", "optimaize",
+    ],
+    # Words that ask for reasoning rather than a lookup; any of them rules out the catalog tier
+    "analysis_keywords": [
+        "compare", "comparison", "versus", "vs", "better", "best", "worse", "recommend", "should",
+        "why", "strategy", "strategic", "roi", "evaluate", "assess", "pros", "cons", "tradeoff",
+        "trade-off", "explain", "improve", "risk of", "forecast", "predict", "plan", "suitable",
+        "fit", "would", "could", "if", "potential", "cost", "costs", "price", "how much", "how many",
+        "next year", "future", "expect", "expected", "achieve", "likely", "will", "can",
+    ],
+    # Words that need the whole portfolio; any of them sends the question to the full tier
+    "portfolio_keywords": [
+        "all", "each", "every", "across", "portfolio", "overall", "most", "least", "highest",
+        "lowest", "rank", "ranking", "products",
+    ],
+    # Longer single-product questions are treated as analysis rather than lookups
+    "max_lookup_words": 14,
+}
+
+FIELD_LABELS = {
+    "kpis": "Key performance indicators",
+    "features": "Key features",
+    "target_market": "Target markets",
+    "revenue_model": "Revenue models",
+    "business_impact": "Business impact",
+    "competitive_advantage": "Competitive advantage",
+    "growth_metrics": "Growth metrics",
+    "challenges": "Key challenges",
+    "description": "Description",
+}
+
+
+def load_routing_config(source=None):
+    """DEFAULT_ROUTING_CONFIG updated from a JSON file path or inline JSON string"""
+    config = copy.deepcopy(DEFAULT_ROUTING_CONFIG)
+    source = source if source is not None else os.getenv("ROUTING_CONFIG", "")
+    if not source.strip():
+        return config
+    if source.lstrip().startswith("{"):
+        overrides = json.loads(source)
+    else:
+        with open(source, encoding="utf-8") as f:
+            overrides = json.load(f)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            for name, item in value.items():
+                if isinstance(item, dict) and isinstance(config[key].get(name), dict):
+                    config[key][name].update(item)
+                else:
+                    config[key][name] = item
+        else:
+            config[key] = value
+    return config
+
+
+def _phrase_pattern(phrases):
+    alternatives = sorted((re.escape(phrase) for phrase in phrases), key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE) if alternatives else None
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """Which tier answers a question, and why"""
+
+    tier: str
+    reason: str
+    model: str = None
+    max_tokens: int = None
+    products: tuple = ()
+    field: str = None
+    answer: str = None
+
+
+class Router:
+    """Rule/keyword classifier over one catalog version"""
+
+    def __init__(self, products, config=None, full_model="gpt-4o"):
+        self.config = config or load_routing_config()
+        self.full_model = full_model
+        self.products = {product["name"]: product for product in products}
+        # Full names match in any case; short names ("Grader") only capitalized
+        self._names = []
+        for name in self.products:
+            self._names.append((re.compile(r"\b" + re.escape(name) + r"\b", re.IGNORECASE), name))
+            short = name.split(" ", 1)[1] if " " in name else None
+            if short:
+                self._names.append((re.compile(r"\b" + re.escape(short) + r"\b"), name))
+        self._fields = [(field, _phrase_pattern(phrases))
+                        for field, phrases in self.config["field_keywords"].items()]
+        self._analysis = _phrase_pattern(self.config["analysis_keywords"])
+        self._portfolio = _phrase_pattern(self.config["portfolio_keywords"])
+        self._lookup_words = frozenset(word.lower() for word in self.config["lookup_words"])
+        self._lock = threading.Lock()
+        self.counts = {tier: 0 for tier in TIERS}
+        self.latency_ms = {tier: 0.0 for tier in TIERS}
+
+    def _tier(self, tier, reason, **fields):
+        if tier == "catalog":
+            return RouteDecision(tier, reason, **fields)
+        settings = self.config["tiers"][tier]
+        return RouteDecision(tier, reason, model=settings.get("model") or self.full_model,
+                             max_tokens=settings.get("max_tokens"), **fields)
+
+    def mentioned_products(self, question):
+        found = []
+        for pattern, name in self._names:
+            if name not in found and pattern.search(question):
+                found.append(name)
+        return tuple(found)
+
+    def classify(self, question):
+        """Pick a tier for a question"""
+        if not self.config.get("enabled", True):
+            return self._tier("full", "routing disabled")
+        products = self.mentioned_products(question)
+        # Product names must not count as field or analysis words ("Price Predictor")
+        remainder = question
+        for pattern, _ in self._names:
+            remainder = pattern.sub(" ", remainder)
+        fields = [field for field, pattern in self._fields if pattern and pattern.search(remainder)]
+        analysis = self._analysis and self._analysis.search(remainder)
+        portfolio = self._portfolio and self._portfolio.search(remainder)
+
+        if len(products) != 1:
+            reason = f"{len(products)} products mentioned" if products else "no product named"
+            return self._tier("full", reason, products=products)
+        if portfolio:
+            return self._tier("full", f"portfolio keyword {portfolio.group(0)!r}", products=products)
+        if analysis:
+            return self._tier("small", f"analysis keyword {analysis.group(0)!r} about one product",
+                              products=products)
+        if len(remainder.split()) > self.config["max_lookup_words"]:
+            return self._tier("small", "long single-product question", products=products)
+        # "What is X's KPIs" mentions "what is" too; a specific field wins over the description
+        specific = [field for field in fields if field != "description"] or fields
+        if len(specific) != 1:
+            return self._tier("small", f"{len(specific)} catalog fields matched", products=products)
+        field = specific[0]
+        extra = self._extra_words(remainder, field)
+        if extra:
+            return self._tier("small", f"not a plain lookup of {field} ({' '.join(extra[:3])!r})",
+                              products=products)
+        return self._tier("catalog", f"lookup of {field}", products=products, field=field,
+                          answer=self.answer(products[0], field))
+
+    def _extra_words(self, remainder, field):
+        """Words of a question beyond its field phrase and lookup filler"""
+        remainder = dict(self._fields)[field].sub(" ", remainder)
+        return [word for word in re.findall(r"\w+(?:'\w+)?", remainder.lower()) if word not in self._lookup_words]
+
+    def answer(self, product_name, field):
+        """Deterministic markdown answer for one catalog field of one product"""
+        product = self.products[product_name]
+        value = product[field] if field in product else product["business_context"][field]
+        items = value if isinstance(value, list) else None
+        if items is None and field not in ("description", "competitive_advantage", "growth_metrics"):
+            items = split_list(value)
+        body = "\n".join(f"- {item}" for item in items) if items else value
+        return f"**{product_name} · {FIELD_LABELS.get(field, field)}**\n\n{body}"
+
+    @contextmanager
+    def timed(self, question, decision):
+        """Log a routing decision with the time its tier took to answer"""
+        start = time.perf_counter()
+        try:
+            yield decision
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.counts[decision.tier] += 1
+                self.latency_ms[decision.tier] += elapsed_ms
+            logger.info("tier=%s model=%s latency_ms=%.1f reason=%s question=%r", decision.tier,
+                        decision.model or "-", elapsed_ms, decision.reason, question[:120])
+
+    def stats(self):
+        """Questions answered per tier and their mean latency in ms"""
+        with self._lock:
+            return [{"tier": tier, "questions": self.counts[tier],
+                     "mean_ms": self.latency_ms[tier] / self.counts[tier] if self.counts[tier] else None}
+                    for tier in TIERS]
+
+
+_routers = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(catalog, full_model):
+    """Router for a products.Catalog, built once per catalog version and model"""
+    key = (catalog.version, full_model)
+    with _routers_lock:
+        router = _routers.get(key)
+        if router is None:
+            router = Router(catalog.products, full_model=full_model)
+            _routers.clear()
+            _routers[key] = router
+        return router
+
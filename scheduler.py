@@ -0,0 +1,308 @@
+"""Process-wide scheduler for OpenAI requests, shared by every session.
+
+Requests wait in a priority queue (interactive before batch, then first come,
+first served) until token buckets for requests and tokens per minute allow
+them. Rate-limit (429), server and connection errors are retried with
+exponential backoff and full jitter; a 429 pauses the whole queue for the
+Retry-After the API asked for. Identical non-streaming requests in flight at
+the same time share one API call.
+
+Calls run on the caller's thread, so streaming responses are consumed by the
+caller as usual; the scheduler only decides when a request may start.
+asyncio callers (the fan-out mode) use submit_async(), which waits for its
+turn on a worker thread and shares the same queue and budgets.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+INTERACTIVE = 0
+BATCH = 1
+
+
+def retryable_errors():
+    """Rate-limit, server and connection errors (openai is imported on first use, not at start-up)"""
+    from openai import APIConnectionError, InternalServerError, RateLimitError
+
+    return RateLimitError, InternalServerError, APIConnectionError
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait, if it said"""
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base_delay=0.5, max_delay=20.0):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def estimate_tokens(request):
+    """Tokens a chat request counts against a TPM limit: prompt estimate plus max_tokens"""
+    chars = sum(len(str(message.get("content", ""))) for message in request.get("messages", ()))
+    return chars // 4 + (request.get("max_tokens") or 0)
+
+
+def request_key(request):
+    """Key identifying identical requests, for single-flight deduplication"""
+    canonical = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class TokenBucket:
+    """``rate_per_minute`` tokens refilled continuously, holding at most ``burst_seconds`` worth"""
+
+    def __init__(self, rate_per_minute, burst_seconds=10.0):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until ``amount`` tokens are available (requests above capacity wait for a full bucket)"""
+        self._refill(now)
+        needed = min(amount, self.capacity) - self.tokens
+        return max(0.0, needed / self.rate)
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.tokens -= amount
+
+
+class _Ticket:
+    __slots__ = ("priority", "seq", "tokens", "granted", "cancelled")
+
+    def __init__(self, priority, seq, tokens):
+        self.priority, self.seq, self.tokens = priority, seq, tokens
+        self.granted = self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class RequestScheduler:
+    """Token-bucket rate limiting, priority queuing, retries and single-flight for API calls"""
+
+    def __init__(self, requests_per_minute=500, tokens_per_minute=0, burst_seconds=10.0, max_retries=4,
+                 base_delay=0.5, max_delay=20.0):
+        self.requests = TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._paused_until = 0.0
+        self._in_flight = {}
+        self.counters = {"started": 0, "completed": 0, "failed": 0, "retries": 0, "rate_limited": 0,
+                         "deduplicated": 0}
+        self._running = 0
+
+    def _wait_for_turn(self, priority, tokens, ticket=None):
+        """Block until this request is at the head of the queue and the budgets allow it
+
+        Returns the seconds waited, or None if ``ticket`` was cancelled before its turn.
+        """
+        start = time.perf_counter()
+        with self._cond:
+            ticket = ticket or _Ticket(priority, next(self._seq), tokens)
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    if ticket.cancelled:
+                        return None
+                    now = time.monotonic()
+                    if self._queue[0] is ticket:
+                        wait = self._paused_until - now
+                        if self.requests is not None:
+                            wait = max(wait, self.requests.wait_time(1, now))
+                        if self.tokens is not None:
+                            wait = max(wait, self.tokens.wait_time(tokens, now))
+                        if wait <= 0:
+                            if self.requests is not None:
+                                self.requests.take(1, now)
+                            if self.tokens is not None:
+                                self.tokens.take(tokens, now)
+                            self.counters["started"] += 1
+                            self._running += 1
+                            ticket.granted = True
+                            return time.perf_counter() - start
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+    def _pause(self, seconds):
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _release(self):
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+    def _retry_delay(self, error, attempt, call):
+        """Seconds to sleep before retrying a failed call, or None when the error must be raised"""
+        if not isinstance(error, retryable_errors()) or attempt == self.max_retries:
+            with self._cond:
+                self.counters["failed"] += 1
+            return None
+        rate_limited = getattr(error, "status_code", None) == 429
+        with self._cond:
+            self.counters["retries"] += 1
+            self.counters["rate_limited"] += rate_limited
+        if call is not None:
+            call.retries += 1
+        if rate_limited:
+            # The limit is account-wide: hold back every queued request, not just this one
+            self._pause(retry_after(error) or backoff_delay(attempt, self.base_delay, self.max_delay))
+            return 0.0
+        delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+        if call is not None:
+            call.queue_ms += delay * 1000
+        return delay
+
+    def _run(self, func, priority, tokens, call):
+        for attempt in range(self.max_retries + 1):
+            waited = self._wait_for_turn(priority, tokens)
+            if call is not None:
+                call.queue_ms += waited * 1000
+            try:
+                return func()
+            except Exception as error:
+                delay = self._retry_delay(error, attempt, call)
+                if delay is None:
+                    raise
+            finally:
+                self._release()
+            time.sleep(delay)
+
+    async def _wait_for_turn_async(self, priority, tokens):
+        """_wait_for_turn() on a worker thread, so the event loop keeps running meanwhile"""
+        with self._cond:
+            ticket = _Ticket(priority, next(self._seq), tokens)
+        try:
+            return await asyncio.to_thread(self._wait_for_turn, priority, tokens, ticket)
+        except asyncio.CancelledError:
+            # Take the ticket out of the queue, or give back a turn granted just as we were cancelled
+            with self._cond:
+                ticket.cancelled = True
+                granted = ticket.granted
+                self._cond.notify_all()
+            if granted:
+                self._release()
+            raise
+
+    def submit(self, func, request=None, priority=INTERACTIVE, dedup=True, call=None):
+        """Run ``func()`` when the budgets allow, retrying transient errors, and return its result
+
+        ``request`` is the keyword arguments of the API call: it sizes the token
+        budget and, unless ``dedup`` is off (streaming), identifies duplicates.
+        ``call`` is an optional telemetry CallRecord whose retries and queue time are filled in.
+        """
+        request = request or {}
+        key = request_key(request) if dedup and request else None
+        if key is not None:
+            with self._cond:
+                leader = self._in_flight.get(key)
+                if leader is None:
+                    future = self._in_flight[key] = Future()
+                else:
+                    self.counters["deduplicated"] += 1
+            if leader is not None:
+                return leader.result()
+        try:
+            result = self._run(func, priority, estimate_tokens(request), call)
+        except BaseException as error:
+            if key is not None:
+                future.set_exception(error)
+            raise
+        finally:
+            if key is not None:
+                with self._cond:
+                    self._in_flight.pop(key, None)
+        with self._cond:
+            self.counters["completed"] += 1
+        if key is not None:
+            future.set_result(result)
+        return result
+
+    async def submit_async(self, func, request=None, priority=INTERACTIVE, call=None):
+        """Await ``func()``, a coroutine function, when the budgets allow, retrying transient errors
+
+        The asyncio counterpart of submit(), sharing its queue, budgets and pauses.
+        Requests are not deduplicated.
+        """
+        tokens = estimate_tokens(request or {})
+        for attempt in range(self.max_retries + 1):
+            waited = await self._wait_for_turn_async(priority, tokens)
+            if call is not None:
+                call.queue_ms += waited * 1000
+            try:
+                result = await func()
+            except Exception as error:
+                delay = self._retry_delay(error, attempt, call)
+                if delay is None:
+                    raise
+            else:
+                with self._cond:
+                    self.counters["completed"] += 1
+                return result
+            finally:
+                self._release()
+            await asyncio.sleep(delay)
+
+    @property
+    def queue_depth(self):
+        """Requests waiting for their turn"""
+        with self._cond:
+            return len(self._queue)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "interactive_queued": sum(ticket.priority == INTERACTIVE for ticket in self._queue),
+                "batch_queued": sum(ticket.priority == BATCH for ticket in self._queue),
+                "running": self._running,
+                "paused_s": max(0.0, self._paused_until - time.monotonic()),
+                **self.counters,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide scheduler (SCHEDULER_RPM, SCHEDULER_TPM, SCHEDULER_BURST_SECONDS, SCHEDULER_MAX_RETRIES)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RequestScheduler(
+                    requests_per_minute=int(os.getenv("SCHEDULER_RPM", "500")),
+                    tokens_per_minute=int(os.getenv("SCHEDULER_TPM", "0")),
+                    burst_seconds=float(os.getenv("SCHEDULER_BURST_SECONDS", "10")),
+                    max_retries=int(os.getenv("SCHEDULER_MAX_RETRIES", "4")),
+                )
+    return _scheduler
@@ -0,0 +1,249 @@
+"""Persistent chat sessions.
+
+Each conversation is an append-only log of zlib-compressed messages in a
+pluggable backend with a Redis-style list interface (rpush/lrange/llen/delete):
+SQLite by default, an in-process stand-in (memory://), or a real Redis server
+(redis://..., needs the redis package). Only a bounded tail of each session
+is kept in memory: at least a page, and whatever the history window has not
+folded into its summary yet. Older messages are read from the log when the
+chat pane asks for them, and sessions idle for too long are dropped from
+memory (not from the log).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+
+# Payload prefixes: compression only pays off for longer messages
+_RAW = b"j"
+_COMPRESSED = b"z"
+
+
+def encode_message(message):
+    raw = json.dumps(message, separators=(",", ":")).encode()
+    compressed = zlib.compress(raw, 6)
+    return _COMPRESSED + compressed if len(compressed) < len(raw) else _RAW + raw
+
+
+def decode_message(payload):
+    payload = bytes(payload)
+    body = zlib.decompress(payload[1:]) if payload[:1] == _COMPRESSED else payload[1:]
+    return json.loads(body)
+
+
+def _resolve_range(length, start, end):
+    """Redis LRANGE semantics: inclusive end, negative indexes count from the end"""
+    if start < 0:
+        start = max(0, length + start)
+    if end < 0:
+        end = length + end
+    return start, min(end, length - 1)
+
+
+class MemoryBackend:
+    """In-process stand-in for a Redis server, e.g. for tests or single-process use"""
+
+    def __init__(self):
+        self._lists = {}
+        self._lock = threading.Lock()
+
+    def rpush(self, key, *values):
+        with self._lock:
+            items = self._lists.setdefault(key, [])
+            items.extend(values)
+            return len(items)
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            items = self._lists.get(key, [])
+            start, end = _resolve_range(len(items), start, end)
+            return items[start:end + 1]
+
+    def llen(self, key):
+        with self._lock:
+            return len(self._lists.get(key, []))
+
+    def delete(self, key):
+        with self._lock:
+            return int(self._lists.pop(key, None) is not None)
+
+
+class SQLiteBackend:
+    """Redis-style lists stored in one SQLite table"""
+
+    def __init__(self, path):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_messages (
+                key TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (key, seq)
+            ) WITHOUT ROWID
+        """)
+        self._conn.commit()
+
+    def _length(self, key):
+        row = self._conn.execute("SELECT MAX(seq) FROM session_messages WHERE key = ?", (key,)).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def rpush(self, key, *values):
+        with self._lock:
+            length = self._length(key)
+            now = time.time()
+            self._conn.executemany(
+                "INSERT INTO session_messages (key, seq, payload, created_at) VALUES (?, ?, ?, ?)",
+                [(key, length + i, value, now) for i, value in enumerate(values)],
+            )
+            self._conn.commit()
+            return length + len(values)
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            start, end = _resolve_range(self._length(key), start, end)
+            rows = self._conn.execute(
+                "SELECT payload FROM session_messages WHERE key = ? AND seq BETWEEN ? AND ? ORDER BY seq",
+                (key, start, end),
+            ).fetchall()
+            return [row[0] for row in rows]
+
+    def llen(self, key):
+        with self._lock:
+            return self._length(key)
+
+    def delete(self, key):
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM session_messages WHERE key = ?", (key,)).rowcount
+            self._conn.commit()
+            return int(deleted > 0)
+
+
+def create_backend(url):
+    """Backend for a SESSION_STORE_URL: memory://, redis://... or a SQLite file path"""
+    if url == "memory://":
+        return MemoryBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The redis package is required for a Redis session store (pip install redis)")
+        return redis.Redis.from_url(url)
+    return SQLiteBackend(url)
+
+
+class ChatSession:
+    """One conversation: the recent tail in memory, the full log in the backend"""
+
+    def __init__(self, store, session_id):
+        self.session_id = session_id
+        self._backend = store.backend
+        self._key = f"chat:{session_id}"
+        self._lock = threading.Lock()
+        self._page_size = store.page_size
+        self.length = self._backend.llen(self._key)
+        # messages[i] is log entry offset + i; older entries are only read from the backend
+        self.offset = max(0, self.length - store.page_size)
+        self.messages = [decode_message(p) for p in self._backend.lrange(self._key, self.offset, -1)]
+        self.last_used = time.monotonic()
+
+    def append(self, role, content, data=None):
+        """Add a message; ``data`` is an optional structured payload rendered alongside it"""
+        message = {"role": role, "content": content}
+        if data is not None:
+            message["data"] = data
+        with self._lock:
+            self._backend.rpush(self._key, encode_message(message))
+            self.messages.append(message)
+            self.length += 1
+        return message
+
+    def read(self, start, end):
+        """Log entries ``start`` up to (not including) ``end``, straight from the backend"""
+        if end <= start:
+            return []
+        return [decode_message(p) for p in self._backend.lrange(self._key, start, end - 1)]
+
+    def trim(self, keep_from):
+        """Drop in-memory messages before log entry ``keep_from``, keeping at least a page"""
+        with self._lock:
+            keep_from = min(keep_from, self.length - self._page_size)
+            if keep_from > self.offset:
+                del self.messages[:keep_from - self.offset]
+                self.offset = keep_from
+
+    def clear(self):
+        """Start the conversation over and drop its log"""
+        with self._lock:
+            self._backend.delete(self._key)
+            self.messages = []
+            self.length = self.offset = 0
+
+    def recent(self, count):
+        """The last ``count`` messages, reading older ones from the backend if needed
+
+        Older messages are not kept: they live only as long as the caller's list.
+        """
+        with self._lock:
+            missing = min(count - len(self.messages), self.offset)
+            older = []
+            if missing > 0:
+                page = self._backend.lrange(self._key, self.offset - missing, self.offset - 1)
+                older = [decode_message(p) for p in page]
+            visible = older + self.messages
+            return visible[-count:] if count > 0 else []
+
+
+class SessionStore:
+    """Process-wide registry of chat sessions with idle eviction from memory"""
+
+    def __init__(self, backend, page_size=20, idle_seconds=1800, max_sessions=1000):
+        self.backend = backend
+        self.page_size = page_size
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_session_id():
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def is_valid_id(session_id):
+        return isinstance(session_id, str) and len(session_id) == 32 and all(
+            c in "0123456789abcdef" for c in session_id)
+
+    def get(self, session_id):
+        """The session for an id, loading its recent messages on first use"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ChatSession(self, session_id)
+                self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            session.last_used = now
+            self._evict(now)
+            return session
+
+    def _evict(self, now):
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        # Oldest first, so stop at the first session still in use
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_used <= self.idle_seconds:
+                break
+            del self._sessions[session_id]
+
+    def __len__(self):
+        return len(self._sessions)
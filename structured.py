@@ -0,0 +1,183 @@
+"""Structured analysis mode: per-product scores, rankings and cited catalog fields.
+
+The model is asked for JSON matching a strict JSON schema (response_format
+json_schema) built from the current catalog, so product names and cited
+fields can only be ones that exist. Replies are validated here: scores are
+range-checked, ranks made consistent with the scores, and every citation is
+checked against the quoted business_context field.
+"""
+
+import json
+from dataclasses import asdict, dataclass
+
+from products import CONTEXT_LIST_FIELDS, CONTEXT_TEXT_FIELDS
+
+MAX_SCORE = 10
+
+CITABLE_FIELDS = CONTEXT_TEXT_FIELDS + CONTEXT_LIST_FIELDS
+
+STRUCTURED_INSTRUCTIONS = f"""
+Answer in the requested JSON format. Score every product that is relevant to the
+question from 0 to {MAX_SCORE} on the criterion the question asks about (rank 1 = best),
+give a one-sentence business rationale per product, and support each score with
+citations: the business_context field it comes from and a short verbatim quote of it.
+"""
+
+
+class StructuredOutputError(ValueError):
+    """A structured reply that is not valid JSON or does not match the schema"""
+
+
+def build_response_format(catalog):
+    """OpenAI response_format for a structured analysis of this catalog"""
+    names = [product["name"] for product in catalog.products]
+    citation = {
+        "type": "object",
+        "properties": {
+            "field": {"type": "string", "enum": list(CITABLE_FIELDS)},
+            "quote": {"type": "string"},
+        },
+        "required": ["field", "quote"],
+        "additionalProperties": False,
+    }
+    product = {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string", "enum": names},
+            "score": {"type": "number", "minimum": 0, "maximum": MAX_SCORE},
+            "rank": {"type": "integer", "minimum": 1},
+            "rationale": {"type": "string"},
+            "citations": {"type": "array", "items": citation},
+        },
+        "required": ["name", "score", "rank", "rationale", "citations"],
+        "additionalProperties": False,
+    }
+    schema = {
+        "type": "object",
+        "properties": {
+            "criterion": {"type": "string"},
+            "summary": {"type": "string"},
+            "products": {"type": "array", "items": product},
+            "recommendation": {"type": "string"},
+        },
+        "required": ["criterion", "summary", "products", "recommendation"],
+        "additionalProperties": False,
+    }
+    return {"type": "json_schema", "json_schema": {"name": "product_analysis", "strict": True, "schema": schema}}
+
+
+@dataclass(frozen=True)
+class Citation:
+    field: str
+    quote: str
+    verified: bool
+
+
+@dataclass(frozen=True)
+class ProductScore:
+    name: str
+    score: float
+    rank: int
+    rationale: str
+    citations: tuple
+
+
+@dataclass(frozen=True)
+class StructuredAnalysis:
+    """A validated structured answer; products are ordered by rank"""
+
+    criterion: str
+    summary: str
+    products: tuple
+    recommendation: str
+
+    def to_json(self):
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        products = tuple(
+            ProductScore(**{**item, "citations": tuple(Citation(**citation) for citation in item["citations"])})
+            for item in data["products"]
+        )
+        return cls(criterion=data["criterion"], summary=data["summary"], products=products,
+                   recommendation=data["recommendation"])
+
+    def to_markdown(self):
+        """Plain-text rendering, used for the chat history and as the model's memory of the turn"""
+        lines = [self.summary, "", f"**Ranking by {self.criterion}:**"]
+        for item in self.products:
+            lines.append(f"{item.rank}. **{item.name}** ({item.score:g}/{MAX_SCORE}): {item.rationale}")
+        lines += ["", f"**Recommendation:** {self.recommendation}"]
+        return "\n".join(lines)
+
+    def chart_data(self):
+        """Scores by product, for st.bar_chart"""
+        return {"Score": {item.name: item.score for item in self.products}}
+
+    def ranking_rows(self):
+        return [{"Rank": item.rank, "Product": item.name, "Score": item.score, "Rationale": item.rationale}
+                for item in self.products]
+
+    def citation_rows(self):
+        return [{"Product": item.name, "Field": citation.field, "Quote": citation.quote,
+                 "Verified": "✅" if citation.verified else "⚠️ not found in catalog"}
+                for item in self.products for citation in item.citations]
+
+
+def _cited_text(product, field):
+    value = product["business_context"].get(field, "")
+    return " ".join(value) if isinstance(value, list) else value
+
+
+def _normalize(text):
+    return " ".join(text.lower().replace("…", "").replace("...", "").strip(" .\"'").split())
+
+
+def parse_analysis(text, catalog):
+    """Validate a structured reply against the catalog, raising StructuredOutputError"""
+    try:
+        data = json.loads(text)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise StructuredOutputError(f"Reply is not valid JSON: {e}") from e
+    if not isinstance(data, dict) or not isinstance(data.get("products"), list):
+        raise StructuredOutputError("Reply must be an object with a 'products' list")
+    for field in ("criterion", "summary", "recommendation"):
+        if not isinstance(data.get(field), str):
+            raise StructuredOutputError(f"'{field}' must be a string")
+
+    catalog_products = {product["name"]: product for product in catalog.products}
+    seen = set()
+    items = []
+    for idx, item in enumerate(data["products"]):
+        where = f"products[{idx}]"
+        if not isinstance(item, dict):
+            raise StructuredOutputError(f"{where} must be an object")
+        name = item.get("name")
+        if name not in catalog_products:
+            raise StructuredOutputError(f"{where}.name {name!r} is not a catalog product")
+        if name in seen:
+            raise StructuredOutputError(f"{where}.name {name!r} is listed twice")
+        seen.add(name)
+        score = item.get("score")
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= MAX_SCORE:
+            raise StructuredOutputError(f"{where}.score must be a number from 0 to {MAX_SCORE}")
+        citations = []
+        for citation in item.get("citations") or []:
+            field, quote = citation.get("field"), str(citation.get("quote", ""))
+            if field not in CITABLE_FIELDS:
+                raise StructuredOutputError(f"{where} cites unknown field {field!r}")
+            verified = bool(quote.strip()) and _normalize(quote) in _normalize(
+                _cited_text(catalog_products[name], field))
+            citations.append(Citation(field=field, quote=quote, verified=verified))
+        items.append((float(score), item.get("rank"), name, str(item.get("rationale", "")), tuple(citations)))
+    if not items:
+        raise StructuredOutputError("Reply scores no products")
+
+    # Ranks follow the scores; the model's own ranks only break ties
+    items.sort(key=lambda item: (-item[0], item[1] if isinstance(item[1], int) else len(items)))
+    products = tuple(ProductScore(name=name, score=score, rank=rank, rationale=rationale, citations=citations)
+                     for rank, (score, _, name, rationale, citations) in enumerate(items, start=1))
+    return StructuredAnalysis(criterion=data["criterion"].strip() or "overall fit", summary=data["summary"],
+                              products=products, recommendation=data["recommendation"])
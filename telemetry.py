@@ -0,0 +1,213 @@
+"""Latency, token and cost telemetry for every LLM call.
+
+Calls are recorded into a bounded, process-wide ring buffer that the sidebar
+summarizes as p50/p95 charts and that can be exported as JSONL or in the
+Prometheus text exposition format.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+# USD per 1M (prompt, completion) tokens; unknown models get no cost estimate
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Estimated USD cost of a call, or None if the model price is unknown"""
+    prices = MODEL_PRICES.get(model)
+    if prices is None or prompt_tokens is None:
+        return None
+    return (prompt_tokens * prices[0] + (completion_tokens or 0) * prices[1]) / 1_000_000
+
+
+@dataclass
+class CallRecord:
+    """One LLM call (or cache hit standing in for one)"""
+
+    kind: str
+    model: str
+    started_at: float
+    request_chars: int = 0
+    prompt_tokens: int = None
+    completion_tokens: int = None
+    ttfb_ms: float = None
+    latency_ms: float = 0.0
+    retries: int = 0
+    queue_ms: float = 0.0
+    cache_hit: bool = False
+    error: str = None
+    cost_usd: float = None
+
+    def set_usage(self, usage):
+        """Copy token counts from an OpenAI ``usage`` object, if the response had one"""
+        if usage is not None:
+            self.prompt_tokens = usage.prompt_tokens
+            self.completion_tokens = usage.completion_tokens
+
+    def mark_first_byte(self, start):
+        if self.ttfb_ms is None:
+            self.ttfb_ms = (time.perf_counter() - start) * 1000
+
+
+def request_size(messages):
+    """Characters of message content sent with a request"""
+    return sum(len(str(message.get("content", ""))) for message in messages)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers (None when empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class Telemetry:
+    """Thread-safe ring buffer of CallRecords"""
+
+    def __init__(self, capacity=1000, jsonl_path=None):
+        self._records = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.jsonl_path = jsonl_path
+        # Running totals survive records falling out of the ring buffer
+        self._totals = {}
+
+    def record(self, record):
+        if record.cost_usd is None:
+            record.cost_usd = estimate_cost(record.model, record.prompt_tokens, record.completion_tokens)
+        with self._lock:
+            self._records.append(record)
+            totals = self._totals.setdefault((record.kind, record.model), {
+                "calls": 0, "errors": 0, "cache_hits": 0, "retries": 0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+            })
+            totals["calls"] += 1
+            totals["errors"] += record.error is not None
+            totals["cache_hits"] += record.cache_hit
+            totals["retries"] += record.retries
+            totals["prompt_tokens"] += record.prompt_tokens or 0
+            totals["completion_tokens"] += record.completion_tokens or 0
+            totals["cost_usd"] += record.cost_usd or 0.0
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(asdict(record)) + "\n")
+
+    @contextmanager
+    def track(self, kind, model, messages=()):
+        """Time a call; the body fills in usage, TTFB and retries on the yielded record"""
+        record = CallRecord(kind=kind, model=model, started_at=time.time(), request_chars=request_size(messages))
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.latency_ms = (time.perf_counter() - start) * 1000
+            self.record(record)
+
+    def records(self):
+        """Snapshot of the buffered records, oldest first"""
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._totals.clear()
+
+    def summary(self):
+        """Per-kind latency percentiles, tokens, cost and error counts over the buffer"""
+        by_kind = {}
+        for record in self.records():
+            by_kind.setdefault(record.kind, []).append(record)
+        rows = []
+        for kind, records in sorted(by_kind.items()):
+            latencies = [r.latency_ms for r in records]
+            ttfbs = [r.ttfb_ms for r in records if r.ttfb_ms is not None]
+            rows.append({
+                "kind": kind,
+                "calls": len(records),
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "ttfb_p50_ms": percentile(ttfbs, 50),
+                "ttfb_p95_ms": percentile(ttfbs, 95),
+                "prompt_tokens": sum(r.prompt_tokens or 0 for r in records),
+                "completion_tokens": sum(r.completion_tokens or 0 for r in records),
+                "retries": sum(r.retries for r in records),
+                "cache_hits": sum(r.cache_hit for r in records),
+                "errors": sum(r.error is not None for r in records),
+                "cost_usd": sum(r.cost_usd or 0.0 for r in records),
+            })
+        return rows
+
+    def to_jsonl(self):
+        """Buffered records as JSON lines"""
+        return "".join(json.dumps(asdict(record)) + "\n" for record in self.records())
+
+    def to_prometheus(self):
+        """Running totals and buffered latency quantiles in Prometheus text format"""
+        with self._lock:
+            totals = {key: dict(value) for key, value in self._totals.items()}
+        lines = []
+        counters = [
+            ("calls", "llm_calls_total", "LLM calls, including cache hits"),
+            ("errors", "llm_call_errors_total", "LLM calls that raised"),
+            ("cache_hits", "llm_cache_hits_total", "Answers served from the response cache"),
+            ("retries", "llm_retries_total", "Retries after rate limits or transient errors"),
+            ("prompt_tokens", "llm_prompt_tokens_total", "Prompt tokens reported by the API"),
+            ("completion_tokens", "llm_completion_tokens_total", "Completion tokens reported by the API"),
+            ("cost_usd", "llm_cost_usd_total", "Estimated spend in USD"),
+        ]
+        for field, metric, help_text in counters:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for (kind, model), values in sorted(totals.items()):
+                lines.append(f'{metric}{{kind="{kind}",model="{model}"}} {values[field]:g}')
+
+        for field, metric, help_text in [("latency_ms", "llm_latency_ms", "LLM call latency"),
+                                         ("ttfb_ms", "llm_ttfb_ms", "LLM time to first byte")]:
+            lines.append(f"# HELP {metric} {help_text} over the recent-call buffer")
+            lines.append(f"# TYPE {metric} summary")
+            groups = {}
+            for record in self.records():
+                value = getattr(record, field)
+                if value is not None:
+                    groups.setdefault((record.kind, record.model), []).append(value)
+            for (kind, model), values in sorted(groups.items()):
+                labels = f'kind="{kind}",model="{model}"'
+                for quantile in (0.5, 0.95):
+                    lines.append(f'{metric}{{{labels},quantile="{quantile}"}} {percentile(values, quantile * 100):.3f}')
+                lines.append(f"{metric}_sum{{{labels}}} {sum(values):.3f}")
+                lines.append(f"{metric}_count{{{labels}}} {len(values)}")
+        return "\n".join(lines) + "\n"
+
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry():
+    """Process-wide telemetry buffer (TELEMETRY_BUFFER_SIZE, optional TELEMETRY_JSONL_PATH)"""
+    global _telemetry
+    if _telemetry is None:
+        with _telemetry_lock:
+            if _telemetry is None:
+                _telemetry = Telemetry(
+                    capacity=int(os.getenv("TELEMETRY_BUFFER_SIZE", "1000")),
+                    jsonl_path=os.getenv("TELEMETRY_JSONL_PATH") or None,
+                )
+    return _telemetry